@@ -0,0 +1,82 @@
+import numpy as np
+from functools import lru_cache
+from lines import board_width, default_win_length, winning_lines
+
+
+@lru_cache(maxsize=None)
+def line_matrix(width, k):
+    """ Return one row per winning line with a 1 on each of its squares. """
+    lines = winning_lines(width, k)
+    matrix = np.zeros((len(lines), width*width), dtype=np.int32)
+    for index, line in enumerate(lines):
+        matrix[index, list(line)] = 1
+    return matrix
+
+
+@lru_cache(maxsize=None)
+def line_squares(width, k):
+    """ Return an array with the squares of each winning line as its rows. """
+    return np.array(winning_lines(width, k), dtype=np.intp)
+
+
+def encode(states):
+    """ Return an (N, size) int8 array of boards from a list of game states. """
+    size = states[0].board.size if states else 9
+    return np.array([state.board.cells() for state in states], dtype=np.int8).reshape(-1, size)
+
+
+def evaluate(boards, k=None):
+    """
+    Evaluate an (N, size) array of boards holding 0, 1 or 2 at once.
+    Returns (winners, ties, legal):
+    the winner of each board (-1 if there is none), whether each board is a tie,
+    and an (N, size) mask of legal moves, empty for finished games.
+    k is the win length and defaults to the board width, up to 5.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    width = board_width(boards.shape[-1])
+    k = k or default_win_length(width)
+    boards = boards.reshape(-1, width*width)
+
+    # Player 1 counts 1 and player 2 counts k+1 on a line,
+    # so a line sums to k or k*(k+1) only when one player holds all of it.
+    weights = np.array([0, 1, k + 1], dtype=np.int32)
+    line_sums = weights[boards] @ line_matrix(width, k).T
+
+    player1 = (line_sums == k).any(axis=1)
+    player2 = (line_sums == k*(k + 1)).any(axis=1)
+    winners = np.where(player1, 1, np.where(player2, 2, -1)).astype(np.int8)
+
+    empty = boards == 0
+    ties = (winners == -1) & ~empty.any(axis=1)
+    legal = empty & (winners == -1)[:, None]
+    return winners, ties, legal
+
+
+def random_playouts(cells, player, count, k=None, rng=None):
+    """
+    Play count random games to the end from one board at once, player moving first.
+    Returns the winner of each game, 0 for a tie.
+    Each game is a random order of the empty squares; a player wins
+    if one of their lines is complete before any of the other player's.
+    """
+    cells = np.asarray(cells, dtype=np.int8)
+    width = board_width(cells.size)
+    k = k or default_win_length(width)
+    rng = rng or np.random.default_rng()
+
+    empty = np.flatnonzero(cells == 0)
+    squares = empty[rng.random((count, empty.size)).argsort(axis=1)]
+    games = np.arange(count)[:, None]
+    times = np.zeros((count, cells.size), dtype=np.int32)
+    times[games, squares] = np.arange(1, empty.size + 1)
+    owners = np.repeat(cells[None, :], count, axis=0)
+    owners[games, squares] = np.where(np.arange(empty.size) % 2 == 0, player, 3 - player)
+
+    # The move that completes a line is the last of its squares to be played.
+    lines = line_squares(width, k)
+    completed = times[:, lines].max(axis=2)
+    never = empty.size + 1
+    player1 = np.where((owners[:, lines] == 1).all(axis=2), completed, never).min(axis=1)
+    player2 = np.where((owners[:, lines] == 2).all(axis=2), completed, never).min(axis=1)
+    return np.where(player1 < player2, 1, np.where(player2 < player1, 2, 0)).astype(np.int8)
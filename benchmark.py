@@ -0,0 +1,376 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from engine import Board, GameState
+from bitboard import BitBoard
+from player import EasyAI, HardAI
+
+# Code run by a fresh interpreter for the cold start benchmarks:
+# the game up to its first menu frame, and the headless tools.
+COLD_START_GUI = """
+from game import TicTacToe
+game = TicTacToe()
+game.main_menu.draw_menu()
+game.main_menu.blit_screen()
+"""
+COLD_START_HEADLESS = "import simulate, server, service"
+
+# Benchmarks run on a corpus of positions from random games with a fixed seed,
+# so results from different commits can be compared.
+DEFAULT_SEED = 20240101
+CORPUS_GAMES = 2000
+
+
+def random_corpus(seed=DEFAULT_SEED, games=CORPUS_GAMES, size=9):
+    """ Return (cells, player to move) for every position of random games. """
+    rng = random.Random(seed)
+    state = GameState(size, bitboard=True)
+    corpus = []
+    for _ in range(games):
+        state.reset()
+        player = 1
+        while not state.is_over():
+            corpus.append((state.board.cells(), player))
+            state.make_move(player, rng.choice(state.legal_moves()))
+            player = 3 - player
+        corpus.append((state.board.cells(), player))
+    return corpus
+
+
+def reachable_positions(player=1):
+    """ Return every reachable 3x3 position, not yet over, where player is to move. """
+    state = GameState(bitboard=True)
+    seen = set()
+    positions = []
+
+    def walk(mover):
+        cells = state.board.cells()
+        if (cells, mover) in seen:
+            return
+        seen.add((cells, mover))
+        if state.is_over():
+            return
+        if mover == player:
+            positions.append(cells)
+        for pos in state.legal_moves():
+            state.make_move(mover, pos)
+            walk(3 - mover)
+            state.undo_move(pos)
+
+    walk(1)
+    walk(2)
+    return positions
+
+
+def load(state, cells):
+    """ Set a game state to the given marks. """
+    state.reset()
+    for pos, cell in enumerate(cells):
+        if cell:
+            state.make_move(cell, pos)
+
+
+def bench_board(board_class, corpus):
+    boards = []
+    for cells, _ in corpus:
+        board = board_class(len(cells))
+        for pos, cell in enumerate(cells):
+            if cell:
+                board.place_move(cell, pos)
+        boards.append((board, 1))
+
+    def run():
+        ops = 0
+        for board, player in boards:
+            for pos in board.empty_square():
+                board.place_move(player, pos)
+                board.undo_move(pos)
+                ops += 1
+        return ops
+    return run
+
+
+def bench_check_winning(corpus):
+    states = []
+    for cells, _ in corpus:
+        state = GameState()
+        load(state, cells)
+        states.append(state)
+
+    def run():
+        for _ in range(10):
+            for state in states:
+                state.check_winning()
+                state.is_over()
+        return 10*len(states)
+    return run
+
+
+def bench_minimax(positions, bitboard):
+    state = GameState(bitboard=bitboard)
+
+    def run():
+        player = HardAI(1, bitboard=bitboard)
+        for cells in positions:
+            load(state, cells)
+            state.player = 1
+            player.minimax(state, 1)
+        return len(positions)
+    return run
+
+
+def memory_profile(positions, cache_size):
+    """
+    Search every position with minimax while tracemalloc traces allocations.
+    Returns the nodes searched, the peak of traced memory above the start,
+    the blocks and bytes still allocated afterwards per node, and the number
+    of garbage collections run. A first untraced pass counts the nodes and
+    sets up the player, so only the steady state is traced.
+    These are not counts of allocations: CPython has no count of memory that
+    is allocated and freed again, which only shows in the peak.
+    """
+    import gc
+    import tracemalloc
+
+    class CountingAI(HardAI):
+        nodes = 0
+
+        def minimax_core(self, *args):
+            self.nodes += 1
+            return HardAI.minimax_core(self, *args)
+
+    state = GameState(bitboard=True)
+    counter = CountingAI(1, cache_size=cache_size)
+    for cells in positions:
+        load(state, cells)
+        counter.minimax(state, 1)
+
+    collections = []
+    callback = lambda phase, info: collections.append(info["generation"]) if phase == "start" else None
+    player = HardAI(1, cache_size=cache_size)
+    load(state, positions[0])
+    player.minimax(state, 1)
+    gc.collect()
+    gc.callbacks.append(callback)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for cells in positions:
+            load(state, cells)
+            player.minimax(state, 1)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        gc.callbacks.remove(callback)
+    retained = [stat for stat in after.compare_to(before, "filename")
+                if not stat.traceback[0].filename.endswith("tracemalloc.py")]
+    return {
+        "nodes": counter.nodes,
+        "peak_bytes": peak - start,
+        "retained_blocks_per_node": sum(stat.count_diff for stat in retained)/counter.nodes,
+        "retained_bytes_per_node": sum(stat.size_diff for stat in retained)/counter.nodes,
+        "gc_collections": len(collections),
+    }
+
+
+def memory_profiles(quick=False):
+    """ Return the memory profile of minimax over every reachable position, without and with its cache. """
+    positions = reachable_positions()[::10 if quick else 1]
+    return {
+        "minimax_memory": memory_profile(positions, 0),
+        "minimax_memory_cached": memory_profile(positions, 10000),
+    }
+
+
+def parallel_speedup(seed=DEFAULT_SEED, quick=False, workers=None):
+    """
+    Time depth-limited alpha-beta on 5x5 openings from random games, serially
+    and with the root split across each number of worker processes.
+    Players have no cache, so every repeat does the same work; each pool is
+    started before it is timed. Returns the seconds and speedup of each.
+    """
+    depth = 3 if quick else 4
+    positions = [cells for cells, _ in random_corpus(seed, 4 if quick else 10, size=25)
+                 if 2 <= sum(1 for cell in cells if cell) <= 6][::3]
+    states = []
+    for cells in positions:
+        state = GameState(25, bitboard=True, k=4)
+        load(state, cells)
+        states.append(state)
+
+    def run(search):
+        start = time.perf_counter()
+        for state in states:
+            search(state, 1, depth)
+        return time.perf_counter() - start
+
+    serial = run(HardAI(1, search="alphabeta", depth=depth, cache_size=0).alphabeta_root)
+    results = {"positions": len(states), "depth": depth, "serial_seconds": serial, "workers": {}}
+    for count in workers or sorted({1, 2, 4, os.cpu_count() or 1}):
+        player = HardAI(1, search="alphabeta", depth=depth, cache_size=0, workers=count)
+        try:
+            player.parallel_root(states[0], 1, depth)
+            seconds = run(player.parallel_root)
+        finally:
+            player.close()
+        results["workers"][count] = {"seconds": seconds, "speedup": serial/seconds}
+    return results
+
+
+def bench_easy_ai(corpus, seed):
+    states = []
+    for cells, _ in corpus:
+        if 0 in cells:
+            state = GameState(bitboard=True)
+            load(state, cells)
+            states.append(state)
+
+    def run():
+        random.seed(seed)
+        player = EasyAI(1)
+        for state in states:
+            player.get_move(state)
+        return len(states)
+    return run
+
+
+def bench_render(corpus, what):
+    """ Draw on the dummy SDL display, so no window is opened. """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from game import TicTacToe
+
+    game = TicTacToe()
+    boards = []
+    for cells, _ in corpus[:500]:
+        board = Board()
+        for pos, cell in enumerate(cells):
+            if cell:
+                board.place_move(cell, pos)
+        boards.append(board)
+    texts = ["Player 1 Turn", "Player 2 Turn", "Thinking...", "Invalid Square."]
+
+    def run():
+        if what == "draw_figures":
+            for board in boards:
+                game.board = board
+                game.draw_board()
+                game.draw_figures()
+            return len(boards)
+        for _ in range(250):
+            for text in texts:
+                game.draw_text(text, 12, game.bar_txt_x, game.bar_txt_y)
+        return 250*len(texts)
+    return run
+
+
+def bench_cold_start(code):
+    """ Time a new Python process running code, on the dummy SDL display. """
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], cwd=directory, env=env, check=True)
+        return 1
+    return run
+
+
+def benchmarks(seed=DEFAULT_SEED, quick=False):
+    """
+    Return the benchmarks by name. Each is a setup function that returns
+    the function to time, which returns its number of operations.
+    """
+    games = CORPUS_GAMES//10 if quick else CORPUS_GAMES
+    corpus = lambda: random_corpus(seed, games)
+    positions = lambda: reachable_positions()[::10 if quick else 1]
+    return {
+        "board_place_undo": lambda: bench_board(Board, corpus()),
+        "bitboard_place_undo": lambda: bench_board(BitBoard, corpus()),
+        "check_winning": lambda: bench_check_winning(corpus()),
+        "minimax_all_positions": lambda: bench_minimax(positions(), False),
+        "minimax_all_positions_bitboard": lambda: bench_minimax(positions(), True),
+        "easy_ai_get_move": lambda: bench_easy_ai(corpus(), seed),
+        "draw_figures": lambda: bench_render(corpus(), "draw_figures"),
+        "draw_text": lambda: bench_render(corpus(), "draw_text"),
+        "cold_start_gui": lambda: bench_cold_start(COLD_START_GUI),
+        "cold_start_headless": lambda: bench_cold_start(COLD_START_HEADLESS),
+    }
+
+
+def run_benchmarks(names=None, seed=DEFAULT_SEED, repeat=3, quick=False):
+    """ Run each benchmark repeat times and return a report with the best time of each. """
+    results = {}
+    for name, setup in benchmarks(seed, quick).items():
+        if names and name not in names:
+            continue
+        bench = setup()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ops = bench()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {"ops": ops, "seconds": best, "ops_per_second": ops/best}
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "quick": quick,
+        "benchmarks": results,
+    }
+
+
+def compare(report, baseline):
+    """ Print the speed of each benchmark relative to a baseline report. """
+    for name, result in report["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if old is None:
+            print("%-32s %12.0f ops/s" % (name, result["ops_per_second"]))
+        else:
+            print("%-32s %12.0f ops/s  %6.2fx" % (
+                name, result["ops_per_second"], result["ops_per_second"]/old["ops_per_second"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine, AI search and rendering.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report to this file")
+    parser.add_argument("--compare", default=None, help="JSON report to compare against")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="use a smaller corpus")
+    parser.add_argument("--memory", action="store_true", help="also profile the memory used by the search")
+    parser.add_argument("--parallel", type=int, nargs="*", default=None, metavar="WORKERS",
+                        help="also time the parallel search with these worker counts (default: 1, 2, 4 and every CPU)")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(benchmarks())
+    if unknown:
+        parser.error("unknown benchmarks: %s" % ", ".join(sorted(unknown)))
+
+    report = run_benchmarks(args.names, args.seed, args.repeat, args.quick)
+    if args.memory:
+        report["memory"] = memory_profiles(args.quick)
+    if args.parallel is not None:
+        report["parallel"] = parallel_speedup(args.seed, args.quick, args.parallel)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
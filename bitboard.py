@@ -0,0 +1,79 @@
+from lines import board_width, default_win_length
+
+
+class BitBoard:
+    """
+    This class is a drop-in replacement for Board.
+    It keeps one integer bitmask per player instead of a NumPy array,
+    so placing, undoing and checking moves are plain integer operations.
+    Wins are found by GameState from its line counts.
+    """
+
+    def __init__(self, size=9, k=None):
+        self.size = size
+        self.width = board_width(size)
+        self.k = k or default_win_length(self.width)
+        self.full = (1 << self.size) - 1
+        self.masks = {1: 0, 2: 0}
+
+    def copy(self):
+        board = BitBoard(self.size, self.k)
+        board.masks = dict(self.masks)
+        return board
+
+    @classmethod
+    def from_board(cls, board, k=None):
+        """ Build a BitBoard holding the same marks as another board. """
+        bitboard = cls(board.length(), k)
+        for pos, cell in enumerate(board.cells()):
+            if cell != 0:
+                bitboard.place_move(cell, pos)
+        return bitboard
+
+    def display(self):
+        print(self.transform())
+
+    def transform(self):
+        """ Return the board as a list of rows. """
+        width = self.width
+        return [[self.cell(row*width + col) for col in range(width)] for row in range(width)]
+
+    def length(self):
+        return self.size
+
+    def cell(self, pos):
+        """ Return the mark in a square, 0 if it is empty. """
+        bit = 1 << pos
+        if self.masks[1] & bit:
+            return 1
+        if self.masks[2] & bit:
+            return 2
+        return 0
+
+    def cells(self):
+        """ Return the marks of all squares as a tuple of ints. """
+        return tuple(self.cell(pos) for pos in range(self.size))
+
+    def occupied_square(self, pos):
+        """ Check whether a square is occupied. """
+        return bool((self.masks[1] | self.masks[2]) >> pos & 1)
+
+    def empty_square(self):
+        """ Return a list of empty squares. """
+        empty = ~(self.masks[1] | self.masks[2]) & self.full
+        return [i for i in range(self.size) if empty >> i & 1]
+
+    def place_move(self, player, pos):
+        """ If a square is not occupied, player places move in the square. """
+        assert not self.occupied_square(pos)
+        self.masks[player] |= 1 << pos
+
+    def undo_move(self, pos):
+        bit = ~(1 << pos)
+        self.masks[1] &= bit
+        self.masks[2] &= bit
+
+    def reset(self):
+        """ Reset board to all zeros. """
+        self.masks[1] = 0
+        self.masks[2] = 0
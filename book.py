@@ -0,0 +1,167 @@
+import argparse
+import mmap
+import struct
+from transposition import canonical, to_canonical, from_canonical
+
+# A book file starts with MAGIC and a header of width, k and the fewest and most
+# marks of its positions, followed by fixed-size entries sorted by key:
+# the canonical base-3 board hash (big-endian), the player to move and the best move
+# on the canonical board.
+MAGIC = b"TTB1"
+HEADER = struct.Struct("<4B")
+
+
+def key_size(width):
+    """ Return the number of bytes needed for the hash of a width x width board. """
+    return ((3**(width*width)).bit_length() + 7)//8
+
+
+class PositionDatabase:
+    """
+    This class looks up best moves in a book file built by build_book.
+    Positions are keyed by canonical board, so one entry covers all symmetric boards.
+    The file is opened on the first lookup. With index=True its entries are then
+    read into a dict; otherwise each lookup binary searches the mapped file.
+    """
+
+    def __init__(self, path, index=False):
+        self.path = path
+        self.index = index
+        self.data = None
+        self.entries = None
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError("%s is not a book file" % self.path)
+        self.width, self.k, self.min_marks, self.max_marks = HEADER.unpack_from(self.data, len(MAGIC))
+        self.key_size = key_size(self.width)
+        self.entry_size = self.key_size + 2
+        self.start = len(MAGIC) + HEADER.size
+        self.count = (len(self.data) - self.start)//self.entry_size
+        if self.index:
+            self.entries = {}
+            for offset in range(self.start, self.start + self.count*self.entry_size, self.entry_size):
+                self.entries[self.data[offset:offset + self.entry_size - 1]] = self.data[offset + self.entry_size - 1]
+
+    def __len__(self):
+        if self.data is None:
+            self.load()
+        return self.count
+
+    def covers(self, state, marks):
+        """ Check whether positions like this one can be in the file. """
+        return state.width == self.width and state.k == self.k and self.min_marks <= marks <= self.max_marks
+
+    def lookup(self, state, player):
+        """ Return the best move for player, or None if the position is not in the file. """
+        if self.data is None:
+            self.load()
+        cells = state.board.cells()
+        if not self.covers(state, sum(1 for cell in cells if cell)):
+            return None
+        key, sym = canonical(cells)
+        target = key.to_bytes(self.key_size, "big") + bytes([player])
+        if self.entries is not None:
+            move = self.entries.get(target)
+        else:
+            move = self.search(target)
+        return None if move is None else from_canonical(move, sym, self.width)
+
+    def search(self, target):
+        """ Binary search the mapped file for an entry. """
+        low, high = 0, self.count
+        size = len(target)
+        while low < high:
+            middle = (low + high)//2
+            offset = self.start + middle*self.entry_size
+            found = self.data[offset:offset + size]
+            if found == target:
+                return self.data[offset + size]
+            if found < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+            self.entries = None
+
+
+class OpeningBook(PositionDatabase):
+    """
+    This class is a child class of PositionDatabase.
+    It holds the first moves of the game, including the empty board.
+    """
+
+
+def write_book(path, width, k, entries):
+    """ Write (cells, player, move) entries to a book file. """
+    size = key_size(width)
+    records = {}
+    marks = []
+    for cells, player, move in entries:
+        key, sym = canonical(cells)
+        records[key.to_bytes(size, "big") + bytes([player])] = to_canonical(move, sym, width)
+        marks.append(sum(1 for cell in cells if cell))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(width, k, min(marks, default=0), max(marks, default=0)))
+        for target in sorted(records):
+            f.write(target + bytes([records[target]]))
+    return len(records)
+
+
+def build_book(path, width=3, k=None, min_marks=0, max_marks=2, depth=None):
+    """
+    Solve every reachable position with between min_marks and max_marks marks
+    and write the best moves to a book file. Player 1 moves first.
+    depth limits each search as in HardAI.
+    """
+    from engine import GameState
+    from player import HardAI
+
+    state = GameState(width*width, bitboard=True, k=k)
+    solvers = {1: HardAI(1, bitboard=True, search="alphabeta", depth=depth),
+               2: HardAI(2, bitboard=True, search="alphabeta", depth=depth)}
+    entries = []
+    seen = set()
+
+    def solve(player, marks):
+        key = canonical(state.board.cells())[0]
+        if key in seen or state.is_over():
+            return
+        seen.add(key)
+        if marks >= min_marks:
+            pos = solvers[player].alphabeta_root(state, player, depth)[1]
+            entries.append((state.board.cells(), player, pos))
+        if marks < max_marks:
+            for pos in state.board.empty_square():
+                state.make_move(player, pos)
+                solve(3 - player, marks + 1)
+                state.undo_move(pos)
+
+    solve(1, 0)
+    return write_book(path, width, state.k, entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book or position database for HardAI.")
+    parser.add_argument("path")
+    parser.add_argument("--width", type=int, default=3, help="squares on a side of the board")
+    parser.add_argument("-k", type=int, default=None, help="marks in a row needed to win")
+    parser.add_argument("--min-marks", type=int, default=0, help="fewest marks on a stored position")
+    parser.add_argument("--max-marks", type=int, default=2, help="most marks on a stored position")
+    parser.add_argument("--depth", type=int, default=None, help="search depth, needed on large boards")
+    args = parser.parse_args()
+
+    count = build_book(args.path, args.width, args.k, args.min_marks, args.max_marks, args.depth)
+    print("Wrote %d positions to %s" % (count, args.path))
+
+
+if __name__ == "__main__":
+    main()
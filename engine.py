@@ -0,0 +1,175 @@
+from bitboard import BitBoard
+from lines import board_width, default_win_length, winning_lines, lines_through
+
+class Board:
+    """
+    This class is used to create a 1d array of zeros with default size of 9.
+    The size must be a square number: 9 for 3x3, 16 for 4x4 and so on.
+    """
+
+    def __init__(self, size=9):
+        import numpy as np
+
+        self.size = size
+        self.width = board_width(size)
+        self.board = np.zeros((self.size))
+
+    def display(self):
+        print(self.board)
+
+    def transform(self):
+        """ Reshape the 1d array to width x width. """
+        return self.board.reshape((self.width, self.width))
+
+    def length(self):
+        return len(self.board)
+
+    def occupied_square(self, pos):
+        """ Check whether a square is occupied. """
+        return self.board[pos] != 0
+
+    def empty_square(self):
+        """ Return a list of empty squares. """
+        return [i for i in range(len(self.board)) if self.board[i] == 0]
+
+    def copy(self):
+        board = Board(self.size)
+        board.board = self.board.copy()
+        return board
+
+    def cell(self, pos):
+        """ Return the mark in a square, 0 if it is empty. """
+        return int(self.board[pos])
+
+    def cells(self):
+        """ Return the marks of all squares as a tuple of ints. """
+        return tuple(int(cell) for cell in self.board)
+
+    def place_move(self, player, pos):
+        """ If a square is not occupied, player places move in the square. """
+        assert not self.occupied_square(pos)
+        self.board[pos] = player
+
+    def undo_move(self, pos):
+        self.board[pos] = 0
+
+    def reset(self):
+        """ Reset board to all zeros. """
+        for i in range(len(self.board)):
+            self.board[i] = 0
+
+    def __str__(self):
+        return [i for i in range(len(self.board))]
+
+    def __repr__(self):
+        return __str__(self)
+
+class GameState:
+    """
+    This class holds the rules of the game: the board, whose turn it is and the winner.
+    It does not depend on pygame, so it can run without a display.
+    Each player's marks on every line are counted as moves are made,
+    so a win is found by looking only at the lines through the last move.
+    A player wins with k marks in a row; k defaults to the board width, up to 5.
+    The squares played so far are kept in order in moves,
+    and every move is passed to the recorder, if one is set.
+    """
+
+    def __init__(self, size=9, bitboard=False, k=None):
+        self.width = board_width(size)
+        self.k = k or default_win_length(self.width)
+        self.lines = winning_lines(self.width, self.k)
+        self.lines_through = lines_through(self.width, self.k)
+        self.board = BitBoard(size, self.k) if bitboard else Board(size)
+        self.player = -1
+        self.winner = -1
+        self.line_counts = {1: [0]*len(self.lines), 2: [0]*len(self.lines)}
+        self.winners = []
+        self.moves = []
+        self.recorder = None
+
+    def opponent(self, player):
+        """ Return the mark of the other player. """
+        return 3 - player
+
+    def legal_moves(self):
+        return self.board.empty_square()
+
+    def legal_move(self, player, pos):
+        return not self.board.occupied_square(pos)
+
+    def make_move(self, player, pos):
+        assert self.legal_move(player, pos)
+        self.board.place_move(player, pos)
+        self.winners.append(self.winner)
+        self.moves.append(pos)
+        counts = self.line_counts[player]
+        for line in self.lines_through[pos]:
+            counts[line] += 1
+            if counts[line] == self.k and self.winner == -1:
+                self.winner = player
+        if self.recorder is not None:
+            self.recorder.record(self)
+
+    def check_winning(self):
+        """ Returns winner if any. """
+        return self.winner
+
+    def undo_move(self, pos):
+        """ Take back the last move, including any win it made. """
+        counts = self.line_counts[self.board.cell(pos)]
+        for line in self.lines_through[pos]:
+            counts[line] -= 1
+        self.board.undo_move(pos)
+        self.winner = self.winners.pop()
+        self.moves.pop()
+
+    def play(self, pos):
+        """ Make a move for the player whose turn it is and pass the turn. """
+        self.make_move(self.player, pos)
+        self.player = self.opponent(self.player)
+
+    def is_tie(self):
+        if len(self.board.empty_square()) == 0 and self.winner == -1:
+            return True
+        else:
+            return False
+
+    def is_over(self):
+        return self.check_winning() != -1 or self.is_tie()
+
+    def reset(self):
+        self.board.reset()
+        self.player = -1
+        self.winner = -1
+        self.line_counts = {1: [0]*len(self.lines), 2: [0]*len(self.lines)}
+        self.winners = []
+        self.moves = []
+
+    def winning_line(self):
+        """ Return the squares of a line held by the winner, or None. """
+        if self.winner == -1:
+            return None
+        counts = self.line_counts[self.winner]
+        for index, line in enumerate(self.lines):
+            if counts[index] == self.k:
+                return line
+        return None
+
+    def copy(self, bitboard=False):
+        """
+        Return an independent copy of the game state.
+        With bitboard=True the copy is played on a BitBoard.
+        """
+        state = GameState(self.board.length(), bitboard=bitboard or isinstance(self.board, BitBoard), k=self.k)
+        if bitboard and not isinstance(self.board, BitBoard):
+            state.board = BitBoard.from_board(self.board, self.k)
+        else:
+            state.board = self.board.copy()
+        state.player = self.player
+        state.winner = self.winner
+        state.line_counts = {1: list(self.line_counts[1]), 2: list(self.line_counts[2])}
+        state.winners = list(self.winners)
+        state.moves = list(self.moves)
+        return state
+
@@ -1,72 +1,37 @@
-import numpy as np
-import pygame
 import sys
-from player import *
-from menu import *
-
-class Board:
-    """
-    This class is used to create a 1d array of zeros with default size of 9.
-    """
-
-    def __init__(self, size=9):
-        self.size = size
-        self.board = np.zeros((self.size))
-
-    def display(self):
-        print(self.board)
-
-    def transform(self):
-        """ Reshape the 1d array to 3x3. """
-        return np.reshape(self.board, (self.size//3, self.size//3))
-
-    def length(self):
-        return len(self.board)
-
-    def occupied_square(self, pos):
-        """ Check whether a square is occupied. """
-        return self.board[pos] != 0
-
-    def empty_square(self):
-        """ Return a list of empty squares. """
-        return [i for i in range(len(self.board)) if self.board[i] == 0]
-
-    def place_move(self, player, pos):
-        """ If a square is not occupied, player places move in the square. """
-        assert not self.occupied_square(pos)
-        self.board[pos] = player
-
-    def undo_move(self, pos):
-        self.board[pos] = 0
-
-    def reset(self):
-        """ Reset board to all zeros. """
-        for i in range(len(self.board)):
-            self.board[i] = 0
-
-    def __str__(self):
-        return [i for i in range(len(self.board))]
+import threading
+import time
+import pygame
+from engine import GameState
+from player import HumanPlayer, EasyAI, HardAI
+from worker import MoveWorker
+from scheduler import Scheduler
+from textcache import TextCache
+from record import GameRecorder
+from menu import MainMenu, CreditsMenu
 
-    def __repr__(self):
-        return __str__(self)
+RESULTS = {0: "Tie", 1: "Player 1 Wins", 2: "Player 2 Wins"}
 
-class TicTacToe():
+class TicTacToe(GameState):
     """
     This class plays TicTacToe game.
+    It draws the game state with pygame and handles input.
     """
 
-    def __init__(self):
+    def __init__(self, bitboard=False, size=9, k=None, fps=30, record=None):
 
-        self.board = Board()
+        GameState.__init__(self, size, bitboard, k)
+        if record is not None:
+            self.recorder = GameRecorder(record)
         self.WIDTH = 600
         self.BAR = 50
         self.HEIGHT = self.WIDTH + self.BAR
-        self.LINE_WIDTH = 15
-        self.SQUARE_SIZE = self.WIDTH//(self.board.length()//3)
+        self.LINE_WIDTH = max(45//self.width, 2)
+        self.SQUARE_SIZE = self.WIDTH//self.width
         self.CIRCLE_RADIUS = self.SQUARE_SIZE//3
-        self.CIRCLE_WIDTH = 15
+        self.CIRCLE_WIDTH = max(45//self.width, 2)
         self.SPACE = self.SQUARE_SIZE//4
-        self.CROSS_WIDTH = 25
+        self.CROSS_WIDTH = max(75//self.width, 3)
         self.bar_txt_x = self.WIDTH/2
         self.bar_txt_y = self.HEIGHT-30
 
@@ -78,9 +43,10 @@ class TicTacToe():
         self.PLAYER1_COLOR = (214, 45, 32)
         self.PLAYER2_COLOR = (0, 87, 231)
 
-        self.player = -1
-        self.winner = -1
-        self.maximizer = HardAI(1)
+        if self.board.size == 9:
+            self.maximizer = HardAI(1)
+        else:
+            self.maximizer = HardAI(1, bitboard=True, search="alphabeta", time_budget=0.5)
         self.minimizer = HumanPlayer(2)
 
         self.UP_KEY = False
@@ -90,156 +56,114 @@ class TicTacToe():
 
         self.running = True
         self.playing = False
+        self.redraw = True
         self.main_menu = MainMenu(self)
         self.credits = CreditsMenu(self)
         self.curr_menu = self.main_menu
 
-        pygame.init()
+        # Only the display and fonts are used, so the other subsystems are left off.
+        pygame.display.init()
+        pygame.font.init()
         pygame.display.set_caption("Tic Tac Toe")
 
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        self.scheduler = Scheduler(fps)
+        self.text_cache = TextCache()
+        self.preloaded = False
+        self.warm_up = threading.Thread(target=self.warm_up_ai, daemon=True)
+        self.warm_up.start()
         self.screen.fill(self.BG_COLOR)
 
-    def draw_lines(self):
-        """ Draw board lines. """
-
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (0, 0), (self.SQUARE_SIZE*3, 0), \
-                        self.LINE_WIDTH)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (0, self.SQUARE_SIZE), (self.SQUARE_SIZE*3, self.SQUARE_SIZE), \
-                        self.LINE_WIDTH)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (0, self.SQUARE_SIZE*2), (self.SQUARE_SIZE*3, self.SQUARE_SIZE*2), \
-                        self.LINE_WIDTH)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (0, self.SQUARE_SIZE*3), (self.SQUARE_SIZE*3, self.SQUARE_SIZE*3), \
-                        self.LINE_WIDTH//2)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (0, 0), (0, self.SQUARE_SIZE*3), \
-                        self.LINE_WIDTH)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (self.SQUARE_SIZE, 0), (self.SQUARE_SIZE, self.SQUARE_SIZE*3), \
-                        self.LINE_WIDTH)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (self.SQUARE_SIZE*2, 0), (self.SQUARE_SIZE*2, self.SQUARE_SIZE*3), \
-                        self.LINE_WIDTH)
-        pygame.draw.line(self.screen, self.LINE_COLOR, \
-                         (self.SQUARE_SIZE*3, 0), (self.SQUARE_SIZE*3, self.SQUARE_SIZE*3), \
-                        self.LINE_WIDTH)
+        # The grid never changes during a game, so it is drawn once
+        # and copied to the screen at the start of each game.
+        self.background = pygame.Surface((self.WIDTH, self.HEIGHT)).convert()
+        self.background.fill(self.BG_COLOR)
+        self.draw_lines(self.background)
+
+    def preload_text(self):
+        """
+        Render every menu once so their fonts and text are cached before they are shown.
+        Called once the first menu is on screen, and drawn over by the next frame.
+        """
+        if self.preloaded:
+            return
+        self.preloaded = True
+        for menu in (self.credits, self.main_menu):
+            menu.draw_menu()
+        self.text_cache.font(pygame.font.get_default_font(), 12)
+        self.text_cache.font(self.font_name, 20)
+
+    def warm_up_ai(self):
+        """
+        Fill the computer player's transposition table from the empty board
+        in the background, so its moves are instant once a game starts.
+        Only 3x3 boards can be searched to the end.
+        """
+        if self.board.size == 9 and self.maximizer.table is not None:
+            self.maximizer.minimax(GameState(self.board.size, k=self.k), self.maximizer.mark)
+
+    def draw_lines(self, surface=None):
+        """ Draw board lines, on the screen unless another surface is given. """
+
+        surface = surface or self.screen
+        board_size = self.SQUARE_SIZE*self.width
+        for i in range(self.width + 1):
+            pygame.draw.line(surface, self.LINE_COLOR, \
+                             (0, self.SQUARE_SIZE*i), (board_size, self.SQUARE_SIZE*i), \
+                            self.LINE_WIDTH if i < self.width else self.LINE_WIDTH//2)
+            pygame.draw.line(surface, self.LINE_COLOR, \
+                             (self.SQUARE_SIZE*i, 0), (self.SQUARE_SIZE*i, board_size), \
+                            self.LINE_WIDTH)
+
+    def draw_board(self):
+        """ Copy the empty board to the screen. """
+        self.screen.blit(self.background, (0, 0))
 
     def draw_figures(self):
         """ Draw 'X' or 'O' on game board. """
 
-        transform_board = self.board.transform()
-        for row in range(self.board.length()//3):
-            for col in range(self.board.length()//3):
-                if transform_board[row][col] == 1:
-                    pygame.draw.circle(self.screen, self.PLAYER1_COLOR, \
-                    (int(col*self.SQUARE_SIZE + self.SQUARE_SIZE//2), int(row*self.SQUARE_SIZE + self.SQUARE_SIZE//2)), \
-                    self.CIRCLE_RADIUS, self.CIRCLE_WIDTH)
-                elif transform_board[row][col] == 2:
-                    pygame.draw.line(self.screen, self.PLAYER2_COLOR, \
-                        (col*self.SQUARE_SIZE + self.SPACE, row*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE), \
-                        (col*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE, row*self.SQUARE_SIZE + self.SPACE), \
-                        self.CROSS_WIDTH)
-                    pygame.draw.line(self.screen, self.PLAYER2_COLOR, \
-                        (col*self.SQUARE_SIZE + self.SPACE, row*self.SQUARE_SIZE + self.SPACE), \
-                        (col*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE, row*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE), \
-                        self.CROSS_WIDTH)
-
-    def draw_vertical_winning_line(self, col):
-        posX = col*self.SQUARE_SIZE + self.SQUARE_SIZE//2
-        pygame.draw.line(self.screen, self.WINNING_LINE, \
-            (posX, self.LINE_WIDTH), (posX, self.HEIGHT-self.LINE_WIDTH), \
-            self.LINE_WIDTH)
-
-    def draw_horizontal_winning_line(self, row):
-        posY = row*self.SQUARE_SIZE + self.SQUARE_SIZE//2
-        pygame.draw.line(self.screen, self.WINNING_LINE, \
-            (self.LINE_WIDTH, posY), (self.HEIGHT-self.LINE_WIDTH, posY), \
-            self.LINE_WIDTH)
-
-    def draw_asc_diagonal_winning_line(self):
-        pygame.draw.line(self.screen, self.WINNING_LINE, \
-            (self.LINE_WIDTH, self.HEIGHT-self.BAR-self.LINE_WIDTH), \
-            (self.WIDTH-self.LINE_WIDTH, self.LINE_WIDTH), \
-            self.LINE_WIDTH)
-
-    def draw_desc_diagonal_winning_line(self):
-        pygame.draw.line(self.screen, self.WINNING_LINE, \
-            (self.LINE_WIDTH, self.LINE_WIDTH), \
-            (self.WIDTH-self.LINE_WIDTH, self.HEIGHT-self.BAR-self.LINE_WIDTH), \
-            self.LINE_WIDTH)
-
-    def legal_move(self, player, pos):
-        return not self.board.occupied_square(pos)
-
-    def make_move(self, player, pos):
-        assert self.legal_move(player, pos)
-        if pos in self.board.empty_square():
-            self.board.place_move(player, pos)
-
-    def check_winning(self):
-        """ Returns winner if any. """
-        transform_board = self.board.transform()
-        # horizontal
-        for row in range(self.board.length()//3):
-            if transform_board[row][0] == transform_board[row][1] \
-                and transform_board[row][0] == transform_board[row][2]:
-                    if transform_board[row][0] == 1:
-                        self.winner = 1
-                    elif transform_board[row][0] == 2:
-                        self.winner = 2
-        # vertical
-        for col in range(self.board.length()//3):
-            if transform_board[0][col] == transform_board[1][col] \
-                and  transform_board[0][col] == transform_board[2][col]:
-                    if transform_board[0][col] == 1:
-                        self.winner = 1
-                    elif transform_board[0][col] == 2:
-                        self.winner = 2
-        # asc
-        if transform_board[2][0] == transform_board[1][1] \
-            and transform_board[2][0] == transform_board[0][2]:
-                if transform_board[2][0] == 1:
-                    self.winner = 1
-                elif transform_board[2][0] == 2:
-                    self.winner = 2
-        # desc
-        if transform_board[0][0] == transform_board[1][1] \
-            and transform_board[0][0] == transform_board[2][2]:
-                if transform_board[0][0] == 1:
-                    self.winner = 1
-                elif transform_board[0][0] == 2:
-                    self.winner = 2
-
-        return self.winner
+        for pos in range(self.board.size):
+            if self.board.occupied_square(pos):
+                self.draw_square(pos)
+
+    def draw_square(self, pos):
+        """ Draw the mark in one square and return the area of the screen it covers. """
+        row, col = divmod(pos, self.width)
+        if self.board.cell(pos) == 1:
+            pygame.draw.circle(self.screen, self.PLAYER1_COLOR, \
+            (int(col*self.SQUARE_SIZE + self.SQUARE_SIZE//2), int(row*self.SQUARE_SIZE + self.SQUARE_SIZE//2)), \
+            self.CIRCLE_RADIUS, self.CIRCLE_WIDTH)
+        elif self.board.cell(pos) == 2:
+            pygame.draw.line(self.screen, self.PLAYER2_COLOR, \
+                (col*self.SQUARE_SIZE + self.SPACE, row*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE), \
+                (col*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE, row*self.SQUARE_SIZE + self.SPACE), \
+                self.CROSS_WIDTH)
+            pygame.draw.line(self.screen, self.PLAYER2_COLOR, \
+                (col*self.SQUARE_SIZE + self.SPACE, row*self.SQUARE_SIZE + self.SPACE), \
+                (col*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE, row*self.SQUARE_SIZE + self.SQUARE_SIZE - self.SPACE), \
+                self.CROSS_WIDTH)
+        return pygame.Rect(col*self.SQUARE_SIZE, row*self.SQUARE_SIZE, self.SQUARE_SIZE, self.SQUARE_SIZE)
 
     def draw_winning_line(self):
-        transform_board = self.board.transform()
-        # horizontal
-        for row in range(self.board.length()//3):
-            if transform_board[row][0] == transform_board[row][1] \
-                and transform_board[row][0] == transform_board[row][2] \
-                and transform_board[row][0] != 0:
-                    self.draw_horizontal_winning_line(row)
-        # vertical
-        for col in range(self.board.length()//3):
-            if transform_board[0][col] == transform_board[1][col] \
-                and transform_board[0][col] == transform_board[2][col] \
-                and transform_board[0][col] != 0:
-                    self.draw_vertical_winning_line(col)
-        # asc
-        if transform_board[2][0] == transform_board[1][1] \
-            and transform_board[2][0] == transform_board[0][2] \
-            and transform_board[2][0] != 0:
-                self.draw_asc_diagonal_winning_line()
-        # desc
-        if transform_board[0][0] == transform_board[1][1] \
-            and transform_board[0][0] == transform_board[2][2] \
-            and transform_board[0][0] != 0:
-                self.draw_desc_diagonal_winning_line()
+        """
+        Draw a line through the winning marks, if any.
+        Returns the area of the screen it covers, or None.
+        """
+        line = self.winning_line()
+        if line is None:
+            return None
+
+        start_row, start_col = divmod(line[0], self.width)
+        end_row, end_col = divmod(line[-1], self.width)
+        step_row = (end_row > start_row) - (end_row < start_row)
+        step_col = (end_col > start_col) - (end_col < start_col)
+        reach = self.SQUARE_SIZE//2 - self.LINE_WIDTH
+        return pygame.draw.line(self.screen, self.WINNING_LINE, \
+            (start_col*self.SQUARE_SIZE + self.SQUARE_SIZE//2 - step_col*reach, \
+             start_row*self.SQUARE_SIZE + self.SQUARE_SIZE//2 - step_row*reach), \
+            (end_col*self.SQUARE_SIZE + self.SQUARE_SIZE//2 + step_col*reach, \
+             end_row*self.SQUARE_SIZE + self.SQUARE_SIZE//2 + step_row*reach), \
+            self.LINE_WIDTH)
 
     def display_winner_human(self):
         if self.winner == 1:
@@ -293,44 +217,43 @@ class TicTacToe():
             pygame.display.update()
             pygame.time.wait(2000)
 
-    def is_tie(self):
-        if len(self.board.empty_square()) == 0 and self.winner == -1:
-            return True
-        else:
-            return False
-
     def game_loop(self):
+        if self.playing:
+            self.warm_up.join()
         while self.playing:
-            self.check_events()
+            self.check_events(busy=True)
             if self.START_KEY:
                 self.playing = False
-            self.screen.fill(self.BG_COLOR)
+            self.draw_board()
             if self.main_menu.state == "Human vs. Human":
-                self.draw_lines()
+                self.start_recording(HumanPlayer(1), HumanPlayer(2))
                 self.draw_help_msg("Player 1 Turn", 11, self.bar_txt_x, self.bar_txt_y)
                 pygame.display.update()
                 self.human_game()
-                pygame.display.update()
                 self.reset_keys()
                 self.reset_game()
             elif self.main_menu.state == "EasyAI vs. Human":
-                self.draw_lines()
+                self.start_recording(EasyAI(1), self.minimizer)
                 pygame.display.update()
                 self.human_easyAI_game()
-                pygame.display.update()
                 self.reset_keys()
                 self.reset_game()
             elif self.main_menu.state == "HardAI vs. Human":
-                self.draw_lines()
+                self.start_recording(self.maximizer, self.minimizer)
                 pygame.display.update()
                 self.human_hardAI_game()
-                pygame.display.update()
                 self.reset_keys()
                 self.reset_game()
 
-    def check_events(self):
-        """ Check keyboard events. """
-        for event in pygame.event.get():
+    def check_events(self, busy=False):
+        """
+        Check keyboard events.
+        Unless busy, this sleeps until an event arrives.
+        Sets redraw when a key press or window event needs the screen redrawn.
+        """
+        for event in self.scheduler.events(busy):
+            if event.type in (pygame.KEYDOWN, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.redraw = True
             if event.type == pygame.QUIT:
                 self.running = False
                 self.playing = False
@@ -353,28 +276,76 @@ class TicTacToe():
         self.BACK_KEY = False
 
     def reset_game(self):
-        self.board.reset()
-        self.player = -1
-        self.winner = -1
+        self.reset()
+        if self.recorder is not None:
+            self.recorder.flush()
+
+    def start_recording(self, player1, player2):
+        """ Tell the recorder, if any, the mode and players of the next game. """
+        if self.recorder is not None:
+            self.recorder.start(self.main_menu.state, player1, player2)
+
+    def pause(self, delay):
+        """
+        Wait delay milliseconds while handling events.
+        Returns False if BACKSPACE was pressed.
+        """
+        end = time.perf_counter() + delay/1000
+        while time.perf_counter() < end:
+            for event in self.scheduler.events(busy=True):
+                if event.type == pygame.QUIT:
+                    sys.exit()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                    return False
+        return True
+
+    def replay(self, games, start=0, delay=500):
+        """
+        Play back games from a game log, one move every delay milliseconds.
+        start is the index in the log of the first game, for numbering them.
+        Games on other boards are skipped; BACKSPACE skips to the next game.
+        """
+        for number, record in enumerate(games, start):
+            if (record.width, record.k) != (self.width, self.k):
+                continue
+            self.reset_game()
+            self.player = 1
+            self.draw_board()
+            self.draw_help_msg("Replaying game %d" % (number + 1), 12, self.bar_txt_x, self.bar_txt_y)
+            pygame.display.update()
+            for pos in record.moves:
+                if not self.pause(delay):
+                    break
+                self.play(pos)
+                pygame.display.update(self.draw_square(pos))
+            else:
+                rects = [self.draw_help_msg(RESULTS.get(record.result, "Unfinished"), 12, self.bar_txt_x, self.bar_txt_y)]
+                if self.winning_line() is not None:
+                    rects.append(self.draw_winning_line())
+                pygame.display.update(rects)
+                self.pause(4*delay)
+        self.running = False
 
     def draw_text(self, text, size, x, y):
         """ Display text on screen. """
-        font = pygame.font.Font(self.font_name, size)
-        text_surface = font.render(text, True, self.font_color)
+        text_surface = self.text_cache.render(text, self.font_name, size, self.font_color)
         text_rect = text_surface.get_rect()
         text_rect.center = (x, y)
         self.screen.blit(text_surface, text_rect)
 
     def draw_help_msg(self, text, size, x, y):
-        """ Display help msg on the bottom bar. """
-        pygame.draw.rect(self.screen, self.BG_COLOR, \
+        """
+        Display help msg on the bottom bar.
+        Returns the area of the screen it covers.
+        """
+        bar_rect = pygame.draw.rect(self.screen, self.BG_COLOR, \
             (self.LINE_WIDTH, self.HEIGHT-self.BAR+self.LINE_WIDTH, self.WIDTH, self.BAR), \
             0)
-        font = pygame.font.Font(pygame.font.get_default_font(), size)
-        text_surface = font.render(text, True, self.font_color)
+        text_surface = self.text_cache.render(text, pygame.font.get_default_font(), size, self.font_color)
         text_rect = text_surface.get_rect()
         text_rect.center = (x, y)
         self.screen.blit(text_surface, text_rect)
+        return bar_rect.union(text_rect)
 
     def turn_msg(self):
         if self.player == 1:
@@ -393,27 +364,27 @@ class TicTacToe():
 
                 pos = HumanPlayer(1).get_move(self)
                 self.make_move(self.player, pos)
-                self.draw_figures()
+                rects = [self.draw_square(pos)]
                 self.board.display()
                 if self.player == self.check_winning() or self.is_tie():
-                    self.draw_winning_line()
+                    rects.append(self.draw_winning_line())
                     game_over = True
                 self.player = HumanPlayer(2).mark
-                self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y)
-                pygame.display.update()
+                rects.append(self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y))
+                pygame.display.update(rects)
 
 
             elif self.player == HumanPlayer(2).mark:
                 pos = HumanPlayer(2).get_move(self)
                 self.make_move(self.player, pos)
-                self.draw_figures()
+                rects = [self.draw_square(pos)]
                 self.board.display()
                 if self.player == self.check_winning() or self.is_tie():
-                    self.draw_winning_line()
+                    rects.append(self.draw_winning_line())
                     game_over = True
                 self.player = HumanPlayer(1).mark
-                self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y)
-                pygame.display.update()
+                rects.append(self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y))
+                pygame.display.update(rects)
 
         if game_over == True:
             self.display_winner_human()
@@ -429,32 +400,52 @@ class TicTacToe():
             if self.player == EasyAI(1).mark:
                 pos = EasyAI(1).get_move(self)
                 self.make_move(self.player, pos)
-                self.draw_figures()
+                rects = [self.draw_square(pos)]
                 self.board.display()
                 if self.player == self.check_winning() or self.is_tie():
-                    self.draw_winning_line()
+                    rects.append(self.draw_winning_line())
                     game_over = True
                 self.player = HumanPlayer(2).mark
-                self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y)
-                pygame.display.update()
+                rects.append(self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y))
+                pygame.display.update(rects)
 
             elif self.player == HumanPlayer(2).mark:
                 pos = HumanPlayer(2).get_move(self)
                 self.make_move(self.player, pos)
-                self.draw_figures()
+                rects = [self.draw_square(pos)]
                 self.board.display()
                 if self.player == self.check_winning() or self.is_tie():
-                    self.draw_winning_line()
+                    rects.append(self.draw_winning_line())
                     game_over = True
                 self.player = EasyAI(1).mark
-                self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y)
-                pygame.display.update()
+                rects.append(self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y))
+                pygame.display.update(rects)
 
         if game_over == True:
             self.display_winner_human_ai()
 
         self.playing = False
 
+    def wait_for_move(self, player):
+        """
+        Compute a computer player's move in the background
+        while keeping the window responsive and showing a thinking message.
+        Returns None if the player pressed BACKSPACE to go back to the menu.
+        """
+        worker = MoveWorker(player, self)
+        frame = 0
+        while not worker.done():
+            for event in self.scheduler.events(busy=True):
+                if event.type == pygame.QUIT:
+                    worker.cancel()
+                    sys.exit()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                    worker.cancel()
+                    return None
+            pygame.display.update(self.draw_help_msg("Thinking" + "."*(frame//10 % 4), 12, self.bar_txt_x, self.bar_txt_y))
+            frame += 1
+        return worker.result()
+
     def human_hardAI_game(self):
 
         self.player = HardAI(1).mark
@@ -462,28 +453,30 @@ class TicTacToe():
 
         while not game_over:
             if self.player == self.maximizer.mark:
-                pos = self.maximizer.get_move(self)
+                pos = self.wait_for_move(self.maximizer)
+                if pos is None:
+                    break
                 self.make_move(self.player, pos)
-                self.draw_figures()
+                rects = [self.draw_square(pos)]
                 self.board.display()
                 if self.player == self.check_winning() or self.is_tie():
-                    self.draw_winning_line()
+                    rects.append(self.draw_winning_line())
                     game_over = True
                 self.player = self.minimizer.mark
-                self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y)
-                pygame.display.update()
+                rects.append(self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y))
+                pygame.display.update(rects)
 
             elif self.player == self.minimizer.mark:
                 pos = self.minimizer.get_move(self)
                 self.make_move(self.player, pos)
-                self.draw_figures()
+                rects = [self.draw_square(pos)]
                 self.board.display()
                 if self.player == self.check_winning() or self.is_tie():
-                    self.draw_winning_line()
+                    rects.append(self.draw_winning_line())
                     game_over = True
                 self.player = self.maximizer.mark
-                self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y)
-                pygame.display.update()
+                rects.append(self.draw_help_msg(self.turn_msg(), 12, self.bar_txt_x, self.bar_txt_y))
+                pygame.display.update(rects)
 
         if game_over == True:
             self.display_winner_human_ai()
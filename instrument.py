@@ -0,0 +1,244 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+# Instrumentation is off unless enable is called, for example by main.py when
+# TICTACTOE_INSTRUMENT names a JSON-lines file or --instrument is given.
+# Nothing is patched while it is off, so it costs nothing.
+ENV_VAR = "TICTACTOE_INSTRUMENT"
+PROFILE_ENV_VAR = "TICTACTOE_PROFILE"
+DEFAULT_INTERVAL = 10.0
+DRAW_METHODS = ("draw_lines", "draw_board", "draw_figures", "draw_square", "draw_winning_line",
+                "draw_text", "draw_help_msg")
+
+_active = None
+
+
+class Instrumentation:
+    """
+    This class wraps the hot paths of the game to count calls and time them.
+    Every interval seconds, and on exit, a snapshot of the totals is appended
+    to a JSON-lines file. With a profile path, the whole program also runs
+    under cProfile, and the stats are dumped there on SIGUSR1 and on exit.
+    """
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL, profile_path=None):
+        self.path = path
+        self.interval = interval
+        self.profile_path = profile_path
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.maxima = Counter()
+        self.depth = 0
+        self.started = time.perf_counter()
+        self.patches = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.profiler = None
+        self.profilers = []
+        self.thread = None
+
+    def patch(self, owner, name, make_wrapper):
+        """ Replace a method or function with a wrapper, remembering the original. """
+        original = getattr(owner, name)
+        setattr(owner, name, functools.wraps(original)(make_wrapper(original)))
+        self.patches.append((owner, name, original))
+
+    def timed(self, key):
+        def make_wrapper(original):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.add_time(key, time.perf_counter() - start)
+            return wrapper
+        return make_wrapper
+
+    def counted(self, key):
+        def make_wrapper(original):
+            def wrapper(*args, **kwargs):
+                self.counts[key] += 1
+                return original(*args, **kwargs)
+            return wrapper
+        return make_wrapper
+
+    def search_nodes(self, key):
+        """ Count every node of a recursive search and the deepest level reached. """
+        def make_wrapper(original):
+            def wrapper(*args, **kwargs):
+                self.counts[key + ".nodes"] += 1
+                self.depth += 1
+                if self.depth > self.maxima[key + ".depth"]:
+                    self.maxima[key + ".depth"] = self.depth
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.depth -= 1
+            return wrapper
+        return make_wrapper
+
+    def timed_move(self, key):
+        """ Time a player's move and count the transposition table hits during it. """
+        def make_wrapper(original):
+            def wrapper(player, state):
+                table = getattr(player, "table", None)
+                hits, misses = (table.hits, table.misses) if table is not None else (0, 0)
+                self.depth = 0
+                start = time.perf_counter()
+                try:
+                    return original(player, state)
+                finally:
+                    self.add_time(key, time.perf_counter() - start)
+                    if table is not None:
+                        self.counts[key + ".cache_hits"] += max(table.hits - hits, 0)
+                        self.counts[key + ".cache_misses"] += max(table.misses - misses, 0)
+            return wrapper
+        return make_wrapper
+
+    def add_time(self, key, elapsed):
+        self.counts[key] += 1
+        self.seconds[key] += elapsed
+        if elapsed > self.maxima[key]:
+            self.maxima[key] = elapsed
+
+    def install(self):
+        """ Wrap the methods of every module that is loaded. """
+        from engine import GameState
+        from player import HardAI
+
+        self.patch(GameState, "check_winning", self.counted("check_winning"))
+        self.patch(HardAI, "get_move", self.timed_move("HardAI.get_move"))
+        self.patch(HardAI, "minimax_core", self.search_nodes("HardAI.minimax"))
+        self.patch(HardAI, "alphabeta", self.search_nodes("HardAI.alphabeta"))
+
+        if "game" in sys.modules:
+            import pygame
+            from game import TicTacToe
+            from scheduler import Scheduler
+
+            for name in DRAW_METHODS:
+                self.patch(TicTacToe, name, self.timed(name))
+            self.patch(pygame.display, "update", self.timed("display.update"))
+            self.patch(Scheduler, "events", self.timed("idle"))
+
+    def uninstall(self):
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches = []
+
+    def snapshot(self):
+        """ Return the totals so far; busy is the time not spent waiting for events. """
+        uptime = time.perf_counter() - self.started
+        return {
+            "time": time.time(),
+            "uptime": uptime,
+            "busy": uptime - self.seconds["idle"] if self.counts["idle"] else None,
+            "counts": dict(self.counts),
+            "seconds": dict(self.seconds),
+            "max": dict(self.maxima),
+        }
+
+    def write_snapshot(self):
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write_snapshot()
+
+    def profile_thread(self, frame, event, arg):
+        """
+        Start a profiler in a new thread, such as the MoveWorker running AI moves.
+        threading calls this on the first event of every thread started after start;
+        enabling the profiler replaces it.
+        """
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Since Python 3.12 one profiler sees every thread, and only one can run.
+            return
+        with self.lock:
+            self.profilers.append(profiler)
+
+    def dump_profile(self, *args):
+        """ Write the cProfile stats gathered so far in every thread, and a snapshot. """
+        if self.profiler is not None:
+            with self.lock:
+                profilers = list(self.profilers)
+            stats = None
+            for profiler in profilers:
+                profiler.snapshot_stats()
+                snapshot = ProfileSnapshot(profiler.stats)
+                if stats is None:
+                    stats = pstats.Stats(snapshot)
+                else:
+                    stats.add(snapshot)
+            stats.dump_stats(self.profile_path)
+        self.write_snapshot()
+
+    def start(self):
+        self.install()
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self.dump_profile)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        if self.profile_path:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            self.profilers.append(self.profiler)
+            threading.setprofile(self.profile_thread)
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.dump_profile()
+        if self.profiler is not None:
+            threading.setprofile(None)
+            self.profiler.disable()
+        self.uninstall()
+
+
+class ProfileSnapshot:
+    """ This class holds stats copied from a running profiler, so pstats can read them without stopping it. """
+
+    def __init__(self, stats):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+
+def enable(path=None, interval=DEFAULT_INTERVAL, profile_path=None):
+    """
+    Start instrumenting the game. Call it after importing the modules to watch.
+    path defaults to the TICTACTOE_INSTRUMENT environment variable, and profile_path
+    to TICTACTOE_PROFILE. Returns the Instrumentation, or None if there is no path.
+    """
+    global _active
+    path = path or os.environ.get(ENV_VAR)
+    profile_path = profile_path or os.environ.get(PROFILE_ENV_VAR)
+    if not path or _active is not None:
+        return _active
+    _active = Instrumentation(path, interval, profile_path)
+    _active.start()
+    return _active
+
+
+def disable():
+    global _active
+    if _active is not None:
+        _active.stop()
+        _active = None
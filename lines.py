@@ -0,0 +1,50 @@
+from functools import lru_cache
+from math import isqrt
+
+# Longest win length used when none is given, as in gomoku.
+MAX_DEFAULT_K = 5
+
+
+def board_width(size):
+    """ Return the number of squares on a side of a square board with size squares. """
+    width = isqrt(size)
+    if width*width != size:
+        raise ValueError("Board size must be a square number, got %d" % size)
+    return width
+
+
+def default_win_length(width):
+    """ Return the win length of a board when none is given: its width, up to 5. """
+    return min(width, MAX_DEFAULT_K)
+
+
+@lru_cache(maxsize=None)
+def winning_lines(width, k):
+    """
+    Return every line of k squares in a row on a width x width board:
+    horizontal, vertical and both diagonals.
+    """
+    if not 1 <= k <= width:
+        raise ValueError("Win length must be between 1 and %d, got %d" % (width, k))
+    lines = []
+    for row in range(width):
+        for col in range(width - k + 1):
+            lines.append(tuple(row*width + col + i for i in range(k)))
+    for col in range(width):
+        for row in range(width - k + 1):
+            lines.append(tuple((row + i)*width + col for i in range(k)))
+    for row in range(width - k + 1):
+        for col in range(width - k + 1):
+            lines.append(tuple((row + i)*width + col + i for i in range(k)))
+    for row in range(width - k + 1):
+        for col in range(k - 1, width):
+            lines.append(tuple((row + i)*width + col - i for i in range(k)))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def lines_through(width, k):
+    """ Return the indices of the winning lines passing through each square. """
+    lines = winning_lines(width, k)
+    return tuple(tuple(index for index, line in enumerate(lines) if pos in line)
+                 for pos in range(width*width))
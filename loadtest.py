@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import random
+import time
+from protocol import DEFAULT_HOST, DEFAULT_PORT, MAX_LINE, encode, decode
+from simulate import percentile, latency_bucket
+from collections import Counter
+
+
+async def play_client(host, port, width, k, rng, latencies):
+    """ Join one match and play random legal moves until it ends. Returns the winner. """
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+
+    async def receive():
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return decode(line)
+
+    try:
+        writer.write(encode({"type": "join", "width": width, "k": k}))
+        message = await receive()
+        while message["type"] == "waiting":
+            message = await receive()
+        mark = message["mark"]
+        empty = set(range(width*width))
+        turn = 1
+        sent = None
+
+        while True:
+            if turn == mark and sent is None and empty:
+                pos = rng.choice(sorted(empty))
+                sent = time.perf_counter()
+                writer.write(encode({"type": "move", "pos": pos}))
+                await writer.drain()
+            message = await receive()
+            if message["type"] == "move":
+                empty.discard(message["pos"])
+                if message["mark"] == mark:
+                    latencies[latency_bucket(time.perf_counter() - sent)] += 1
+                    sent = None
+                turn = 3 - message["mark"]
+            elif message["type"] == "end":
+                return message["winner"]
+            else:
+                raise ConnectionError("Unexpected message: %s" % message)
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, clients, matches, width, k, seed):
+    """ Play matches with many concurrent clients and return a report. """
+    rng = random.Random(seed)
+    latencies = Counter()
+    results = Counter()
+    remaining = [matches*2]
+
+    async def client_loop():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            results[await play_client(host, port, width, k, rng, latencies)] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    games = sum(results.values())//2
+    return {
+        "matches": games,
+        "matches_per_second": games/elapsed,
+        "moves_per_second": sum(latencies.values())/elapsed,
+        "move_latency_p50": percentile(latencies, 0.50),
+        "move_latency_p99": percentile(latencies, 0.99),
+    }
+
+
+async def run(args):
+    server = None
+    if args.serve:
+        from server import GameServer
+        server = GameServer(args.host, args.port)
+        await server.start()
+    try:
+        return await load_test(args.host, server.port if server else args.port, args.clients,
+                               args.matches, args.width, args.k, args.seed)
+    finally:
+        if server:
+            await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play random matches against a Tic Tac Toe server.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-c", "--clients", type=int, default=200, help="concurrent connections (even)")
+    parser.add_argument("-n", "--matches", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=3)
+    parser.add_argument("-k", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help="run a server in this process on a free port")
+    args = parser.parse_args()
+    if args.serve:
+        args.port = 0
+
+    report = asyncio.run(run(args))
+    print("%d matches, %.0f matches/s, %.0f moves/s" % (
+        report["matches"], report["matches_per_second"], report["moves_per_second"]))
+    print("move round trip p50: %.1f us  p99: %.1f us" % (
+        1e6*report["move_latency_p50"], 1e6*report["move_latency_p99"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,34 @@
-from game import *
+import argparse
+import sys
+import instrument
+from game import TicTacToe
+from record import GameLog
+
+parser = argparse.ArgumentParser(description="Play Tic Tac Toe.")
+parser.add_argument("--width", type=int, default=3, help="squares on a side of the board")
+parser.add_argument("-k", type=int, default=None, help="marks in a row needed to win")
+parser.add_argument("--fps", type=int, default=30, help="frame rate cap while animating")
+parser.add_argument("--record", default=None, help="append finished games to this game log")
+parser.add_argument("--replay", default=None, help="play back the games in this game log")
+parser.add_argument("--start", type=int, default=0, help="first game to play back")
+parser.add_argument("--instrument", default=None,
+                    help="append timing snapshots to this JSON-lines file (or set %s)" % instrument.ENV_VAR)
+parser.add_argument("--profile", default=None,
+                    help="with instrumentation, dump cProfile stats to this file on SIGUSR1 and exit")
+args = parser.parse_args()
+instrument.enable(args.instrument, profile_path=args.profile)
+
+if args.replay:
+    log = GameLog(args.replay)
+    first = next(log.games(args.start), None)
+    if first is None:
+        sys.exit("No games to replay in %s" % args.replay)
+    game = TicTacToe(size=first.width*first.width, k=first.k, fps=args.fps)
+    game.replay(log.games(args.start), args.start)
+    sys.exit()
 
 # Start Game
-game = TicTacToe()
+game = TicTacToe(size=args.width*args.width, k=args.k, fps=args.fps, record=args.record)
 while game.running:
     game.curr_menu.display_menu()
     game.game_loop()
@@ -19,7 +19,7 @@ class Menu:
     def blit_screen(self):
         self.tictactoe.screen.blit(self.tictactoe.screen, (0, 0))
         pygame.display.update()
-        self.tictactoe.reset_keys()
+        self.tictactoe.redraw = False
 
 class MainMenu(Menu):
     """
@@ -43,18 +43,25 @@ class MainMenu(Menu):
 
     def display_menu(self):
         self.run_display = True
+        self.tictactoe.redraw = True
         while self.run_display:
+            if self.tictactoe.redraw:
+                self.draw_menu()
+                self.blit_screen()
+                self.tictactoe.preload_text()
             self.tictactoe.check_events()
             self.check_input()
-            self.tictactoe.screen.fill(self.tictactoe.BG_COLOR)
-            self.tictactoe.draw_text("TIC TAC TOE", 40, self.tictactoe.WIDTH/2, self.tictactoe.HEIGHT/2)
-            self.tictactoe.draw_text("Human vs Human", 12, self.human_x, self.human_y)
-            self.tictactoe.draw_text("Easy AI vs Human", 12, self.human_easyAI_x, self.human_easyAI_y)
-            self.tictactoe.draw_text("Hard AI vs Human", 12, self.human_hardAI_x, self.human_hardAI_y)
-            self.tictactoe.draw_text("Credits", 12, self.credits_x, self.credits_y)
-            self.tictactoe.draw_help_msg("Press UP and DOWN to move cursor. Press ENTER to make selection", 11, self.bar_x, self.bar_y)
-            self.draw_cursor()
-            self.blit_screen()
+            self.tictactoe.reset_keys()
+
+    def draw_menu(self):
+        self.tictactoe.screen.fill(self.tictactoe.BG_COLOR)
+        self.tictactoe.draw_text("TIC TAC TOE", 40, self.tictactoe.WIDTH/2, self.tictactoe.HEIGHT/2)
+        self.tictactoe.draw_text("Human vs Human", 12, self.human_x, self.human_y)
+        self.tictactoe.draw_text("Easy AI vs Human", 12, self.human_easyAI_x, self.human_easyAI_y)
+        self.tictactoe.draw_text("Hard AI vs Human", 12, self.human_hardAI_x, self.human_hardAI_y)
+        self.tictactoe.draw_text("Credits", 12, self.credits_x, self.credits_y)
+        self.tictactoe.draw_help_msg("Press UP and DOWN to move cursor. Press ENTER to make selection", 11, self.bar_x, self.bar_y)
+        self.draw_cursor()
 
     def move_cursor(self):
         if self.tictactoe.DOWN_KEY:
@@ -111,14 +118,20 @@ class CreditsMenu(Menu):
 
     def display_menu(self):
         self.run_display = True
+        self.tictactoe.redraw = True
         while self.run_display:
+            if self.tictactoe.redraw:
+                self.draw_menu()
+                self.blit_screen()
             self.tictactoe.check_events()
             self.check_input()
-            self.tictactoe.screen.fill((0, 0, 0))
-            self.tictactoe.draw_text("Credits", 20, self.tictactoe.WIDTH/2, self.tictactoe.HEIGHT/2-20)
-            self.tictactoe.draw_text("Made by Beijing", 20, self.tictactoe.WIDTH/2, self.tictactoe.HEIGHT/2+10)
-            self.tictactoe.draw_help_msg("Press BACKSPACE to go back to Main Menu.", 11, self.bar_x, self.bar_y)
-            self.blit_screen()
+            self.tictactoe.reset_keys()
+
+    def draw_menu(self):
+        self.tictactoe.screen.fill((0, 0, 0))
+        self.tictactoe.draw_text("Credits", 20, self.tictactoe.WIDTH/2, self.tictactoe.HEIGHT/2-20)
+        self.tictactoe.draw_text("Made by Beijing", 20, self.tictactoe.WIDTH/2, self.tictactoe.HEIGHT/2+10)
+        self.tictactoe.draw_help_msg("Press BACKSPACE to go back to Main Menu.", 11, self.bar_x, self.bar_y)
 
     def check_input(self):
         if self.tictactoe.BACK_KEY:
@@ -1,7 +1,14 @@
-import pygame
 import sys
 import random
 import math
+import time
+from collections import Counter
+from position import Position
+from protocol import DEFAULT_HOST, DEFAULT_PORT, encode, decode
+from table import PerfectPlayTable, TABLE_PATH
+from transposition import TranspositionTable, canonical, to_canonical, from_canonical, \
+    EXACT, LOWER, UPPER
+from search import SearchBoard, INFINITY, MOVE_BITS, pack, unpack
 
 class Player:
     """
@@ -9,10 +16,19 @@ class Player:
     """
     def __init__(self, mark):
         self.mark = mark
+        self.cancelled = False
 
-    def get_move(self):
+    def get_move(self, state):
         pass
 
+    def end_game(self, state):
+        """ Called once a game is over. """
+        pass
+
+    def cancel(self):
+        """ Ask a move computation running in another thread to stop. """
+        self.cancelled = True
+
 class HumanPlayer(Player):
     """
     This class is a child class of player.
@@ -25,11 +41,13 @@ class HumanPlayer(Player):
         super().__init__(mark)
 
     def get_move(self, tictactoe):
+        import pygame
+
         valid_square = False
         pos = 100
 
         while not valid_square:
-            for event in pygame.event.get():
+            for event in tictactoe.scheduler.events():
                 if event.type == pygame.QUIT:
                     sys.exit()
 
@@ -40,15 +58,15 @@ class HumanPlayer(Player):
                     click_row = int(mouseY // tictactoe.SQUARE_SIZE)
                     click_col = int(mouseX // tictactoe.SQUARE_SIZE)
 
-                    pos = click_row * (tictactoe.board.size//3) + click_col
+                    pos = click_row * tictactoe.board.width + click_col
                     try:
                         pos = int(pos)
-                        if pos not in tictactoe.board.empty_square():
+                        # Past the last column, when the window is not a multiple of the board width.
+                        if click_col >= tictactoe.board.width or pos not in tictactoe.board.empty_square():
                             raise ValueError
                         valid_square = True
                     except ValueError:
-                        tictactoe.draw_help_msg("Invalid Square.", 12, tictactoe.bar_txt_x, tictactoe.bar_txt_y)
-                        pygame.display.update()
+                        pygame.display.update(tictactoe.draw_help_msg("Invalid Square.", 12, tictactoe.bar_txt_x, tictactoe.bar_txt_y))
                         print("Invalid Square.")
 
         return pos
@@ -64,55 +82,746 @@ class EasyAI(Player):
     def __init__(self, mark):
         super().__init__(mark)
 
-    def get_move(self, tictactoe):
+    def get_move(self, state):
         pos = 100
-        pos = random.choice(tictactoe.board.empty_square())
+        pos = random.choice(state.board.empty_square())
         return pos
 
+class SearchTimeout(Exception):
+    """ Raised inside a search when its time budget runs out. """
+
+
+class SearchCancelled(Exception):
+    """ Raised inside a search when the player is cancelled. """
+
+
+# Search depth of HardAI on boards larger than 3x3 when it is given no depth or time budget;
+# full search cannot finish there.
+LARGE_BOARD_DEPTH = 3
+
+# Last item of the transposition table keys of minimax_core, whose entries are packed ints
+# instead of the (position, score, flag, depth) tuples of alpha-beta.
+MINIMAX_ENTRY = "minimax"
+
+
+# Players kept in each worker process of a parallel HardAI, so their caches stay warm
+# between moves, and the bound shared by the workers: the number of the current root
+# search, then the best score found so far among its moves.
+_searchers = {}
+_root_bound = None
+
+
+def init_root_worker(bound):
+    global _root_bound
+    _root_bound = bound
+
+
+def search_root_move(job):
+    """
+    Score one move of the root in a worker process and return (position, score).
+    Alpha-beta searches with the window lowered by one point below the best score
+    the workers have found so far, as alphabeta_root does, and raises that bound.
+    """
+    position, mark, player, pos, search, depth, cache_size, generation = job
+    key = (mark, search, depth, cache_size, position.width, position.k)
+    solver = _searchers.get(key)
+    if solver is None:
+        solver = _searchers[key] = HardAI(mark, bitboard=True, cache_size=cache_size, search=search, depth=depth)
+        solver.table_shape = (position.size, position.k)
+    state = position.to_state()
+    state.make_move(player, pos)
+    opponent = state.opponent(player)
+    if search == "minimax":
+        return pos, solver.minimax(state, opponent)["score"]
+
+    child_depth = None if depth is None else depth - 1
+    sign = 1 if player == mark else -1
+    with _root_bound.get_lock():
+        best = _root_bound[1] if _root_bound[0] == generation else -math.inf
+    if sign == 1:
+        score = solver.alphabeta(state, opponent, best - 1, math.inf, child_depth)[0]
+    else:
+        score = solver.alphabeta(state, opponent, -math.inf, -best + 1, child_depth)[0]
+    with _root_bound.get_lock():
+        # A task left running by a cancelled search must not raise the next search's bound.
+        if _root_bound[0] == generation and sign*score > _root_bound[1]:
+            _root_bound[1] = sign*score
+    return pos, score
+
+
 class HardAI(Player):
     """
     This class is a child class of player.
     This class creates a computer player.
     This computer player choose the best move on the board.
+    With bitboard=True the search runs on a BitBoard copy of the board.
+    Solved positions are cached in a transposition table of cache_size
+    entries; cache_size=0 disables the cache.
+    With search="alphabeta" the tree is searched with alpha-beta pruning
+    and move ordering instead of plain minimax.
+    With a depth, alpha-beta stops that many moves ahead and scores the
+    position heuristically, which is needed on boards larger than 3x3.
+    Without a depth or time budget, those boards are searched with alpha-beta
+    LARGE_BOARD_DEPTH moves ahead.
+    With a time_budget in seconds, alpha-beta deepens one move at a time
+    and returns the best move of the deepest search finished in time;
+    last_depth holds the depth that was reached.
+    With a service, moves are asked of a shared EvaluationService from service.py,
+    which searches with its own depth and caches moves across players.
+    A book and a database from book.py are asked for a move first, in that order;
+    sources counts the moves taken from the book, the database and the search.
+    With workers, the moves of the root are searched in that many processes,
+    which share the best score found so far; the answer is the serial one.
+    Call close to stop them.
     """
-    def __init__(self, mark):
+    def __init__(self, mark, bitboard=False, cache_size=10000, search="minimax", depth=None,
+                 time_budget=None, service=None, book=None, database=None, workers=None):
         super().__init__(mark)
+        if search not in ("minimax", "alphabeta"):
+            raise ValueError("Unknown search: %s" % search)
+        if (depth is not None or time_budget is not None) and search != "alphabeta":
+            raise ValueError("A search depth or time budget needs search=\"alphabeta\"")
+        self.bitboard = bitboard
+        self.search = search
+        self.depth = depth
+        self.time_budget = time_budget
+        self.deadline = None
+        self.last_depth = 0
+        self.cache_size = cache_size
+        self.table = TranspositionTable(cache_size) if cache_size > 0 else None
+        self.table_shape = (9, 3)
+        self.core = None
+        self.service = service
+        self.book = book
+        self.database = database
+        self.sources = Counter()
+        self.workers = workers
+        self.executor = None
+        self.root_bound = None
 
-    def get_move(self, tictactoe):
-        if len(tictactoe.board.empty_square()) == 9:
-            best_pos = random.choice(tictactoe.board.empty_square())
-        else:
-            best_pos = self.minimax(tictactoe, self.mark)["position"]
+    def get_move(self, state):
+        for name, source in (("book", self.book), ("database", self.database)):
+            if source is not None:
+                pos = source.lookup(state, self.mark)
+                if pos is not None:
+                    self.sources[name] += 1
+                    return pos
+
+        self.sources["search"] += 1
+        if len(state.board.empty_square()) == state.board.size:
+            self.last_depth = 0
+            if state.board.size > 9:
+                return self.center_squares(state)[0]
+            return random.choice(state.board.empty_square())
+
+        if self.service is not None:
+            return self.service.best_move(state, self.mark)
+        state = state.copy(bitboard=self.bitboard)
+        if self.table is not None and self.table_shape != (state.board.size, state.k):
+            self.table.clear()
+            self.table_shape = (state.board.size, state.k)
+        if self.time_budget is not None:
+            return self.iterative_deepening(state)
+        depth = self.depth
+        if depth is None and state.board.size > 9:
+            depth = LARGE_BOARD_DEPTH
+        if self.workers:
+            return self.parallel_root(state, self.mark, depth)[1]
+        if self.search == "alphabeta" or depth is not None:
+            return self.alphabeta_root(state, self.mark, depth)[1]
+        return self.minimax(state, self.mark)["position"]
+
+    def iterative_deepening(self, state):
+        """
+        Search one move deeper at a time until the time budget runs out.
+        Returns the best move of the deepest finished search.
+        """
+        self.deadline = time.perf_counter() + self.time_budget
+        empty = len(state.board.empty_square())
+        max_depth = empty if self.depth is None else min(self.depth, empty)
+        best_pos = self.order_moves(state, self.mark, state.opponent(self.mark))[0]
+        self.last_depth = 0
+        try:
+            for depth in range(1, max_depth + 1):
+                score, best_pos = self.alphabeta_root(state, self.mark, depth, first=best_pos)
+                self.last_depth = depth
+                if abs(score) >= 1:
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
         return best_pos
 
-    def minimax(self, tictactoe, player):
+    def parallel_root(self, state, player, depth=None):
+        """
+        Search the children of the current position across the worker processes
+        and return (score, position). Each move is a separate task, sent in the
+        order the serial search tries them. A move that fails low in a worker
+        scores below the best, so the answer is the same as the serial search,
+        ties going to the lowest square.
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        if self.executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.root_bound = multiprocessing.Array("d", [0, -math.inf])
+            self.executor = ProcessPoolExecutor(self.workers, initializer=init_root_worker,
+                                                initargs=(self.root_bound,))
+        with self.root_bound.get_lock():
+            self.root_bound[0] += 1
+            self.root_bound[1] = -math.inf
+            generation = self.root_bound[0]
+        search = "alphabeta" if depth is not None else self.search
+        if search == "alphabeta":
+            moves = self.order_moves(state, player, state.opponent(player))
+        else:
+            moves = state.board.empty_square()
+        position = Position.from_state(state)
+        pending = {self.executor.submit(search_root_move, (position, self.mark, player, pos, search,
+                                                           depth, self.cache_size, generation))
+                   for pos in moves}
+
+        sign = 1 if player == self.mark else -1
+        best_score = -math.inf
+        best_pos = -1
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                if self.cancelled:
+                    raise SearchCancelled
+                for future in done:
+                    pos, score = future.result()
+                    if sign*score > best_score or sign*score == best_score and pos < best_pos:
+                        best_score = sign*score
+                        best_pos = pos
+        finally:
+            for future in pending:
+                future.cancel()
+        return sign*best_score, best_pos
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def minimax(self, state, player):
+        """
+        Search to the end of the game and return the best position and its score.
+        The search itself runs on a SearchBoard in minimax_core.
+        """
+        if self.cancelled:
+            raise SearchCancelled
         max_player = self.mark
-        min_player = tictactoe.minimizer.mark if player == self.mark else self.mark
+        min_player = state.opponent(player)
+        empty = len(state.board.empty_square())
 
-        if tictactoe.check_winning() == min_player:
-            return {"position": -1, "score": 1*(len(tictactoe.board.empty_square()) + 1) \
+        if state.check_winning() == min_player:
+            return {"position": -1, "score": 1*(empty + 1) \
                 if min_player == max_player \
-                else -1 * (len(tictactoe.board.empty_square()) + 1)}
-        elif len(tictactoe.board.empty_square()) == 0:
+                else -1 * (empty + 1)}
+        elif empty == 0:
             return {"position": -1, "score": 0}
 
-        if player == max_player:
-            best = {"position": -1, "score": -math.inf}
-        else:
-            best = {"position": -1, "score": math.inf}
+        shape = (state.board.size, state.k)
+        if self.core is None or self.core.shape != shape + (self.table is not None,):
+            self.core = SearchBoard(state.width, state.k, self.table is not None)
+        if self.table is not None and self.table_shape != shape:
+            self.table.clear()
+            self.table_shape = shape
+        self.core.load(state)
+        score, pos = unpack(self.minimax_core(player, empty, 0))
+        return {"position": pos, "score": score}
+
+    def minimax_core(self, player, empty, top):
+        """
+        Search the position on self.core, with empty squares left and player to move.
+        Its moves go on the move stack from top. Returns the score and best square
+        packed into one int; below the root, only the score is used.
+        Results are cached in the transposition table by canonical hash, player
+        and MINIMAX_ENTRY, which keeps them apart from alpha-beta's entries, as the
+        score and a bitmask of every best square on the canonical board, so the
+        lowest best square can be found for any symmetric position, as when searching.
+        """
+        if self.cancelled:
+            raise SearchCancelled
+        board = self.core
+        table = self.table
+        if table is not None:
+            sym = board.canonical()
+            key = (board.keys[sym], player, MINIMAX_ENTRY)
+            entry = table.get(key)
+            if entry is not None:
+                if top:
+                    return entry >> board.size << MOVE_BITS
+                return pack(entry >> board.size, board.lowest_from_canonical(entry & board.full, sym))
+
+        maximizing = player == self.mark
+        opponent = 3 - player
+        best_score = -INFINITY if maximizing else INFINITY
+        best_pos = -1
+        best_mask = 0
+        stack = board.stack
+        end = board.generate(top)
+        i = top
+        while i < end:
+            pos = stack[i]
+            if board.place(player, pos):
+                score = empty if maximizing else -empty
+            elif empty == 1:
+                score = 0
+            else:
+                score = self.minimax_core(opponent, empty - 1, end) >> MOVE_BITS
+            board.remove(player, pos)
+            if score > best_score if maximizing else score < best_score:
+                best_score = score
+                best_pos = pos
+                best_mask = 1 << pos
+            elif score == best_score:
+                best_mask |= 1 << pos
+            i += 1
+
+        if table is not None:
+            table.put(key, best_score << board.size | board.to_canonical(best_mask, sym))
+        return pack(best_score, best_pos)
+
+    def center_squares(self, state):
+        """ Return the squares ordered by distance from the center of the board. """
+        middle = (state.width - 1)/2
+        return sorted(range(state.board.size),
+                      key=lambda pos: abs(pos//state.width - middle) + abs(pos % state.width - middle))
+
+    def candidate_moves(self, state):
+        """
+        Return the empty squares worth searching.
+        On boards larger than 3x3 only squares next to a mark are considered.
+        """
+        empty = state.board.empty_square()
+        if state.width <= 3 or len(empty) == state.board.size:
+            return empty
+        width = state.width
+        candidates = []
+        for pos in empty:
+            row, col = divmod(pos, width)
+            for r in range(max(row - 1, 0), min(row + 2, width)):
+                if any(state.board.occupied_square(r*width + c) for c in range(max(col - 1, 0), min(col + 2, width))):
+                    candidates.append(pos)
+                    break
+        return candidates
 
-        for pos in tictactoe.board.empty_square():
-            tictactoe.make_move(player, pos)
-            sim_score = self.minimax(tictactoe, min_player)
-            tictactoe.board.undo_move(pos)
-            tictactoe.winner = -1
-            sim_score["position"] = pos
+    def order_moves(self, state, player, opponent):
+        """
+        Return the candidate moves, most promising first:
+        immediate wins, blocks, then squares on the most open lines,
+        which on 3x3 is the center, corners, then edges.
+        """
+        mine = state.line_counts[player]
+        theirs = state.line_counts[opponent]
+        k = state.k
 
+        def priority(pos):
+            wins = blocks = 0
+            potential = 0
+            for line in state.lines_through[pos]:
+                if theirs[line] == 0:
+                    potential += 1 + mine[line]*mine[line]
+                    if mine[line] == k - 1:
+                        wins = 1
+                if mine[line] == 0:
+                    potential += 1 + theirs[line]*theirs[line]
+                    if theirs[line] == k - 1:
+                        blocks = 1
+            return (-wins, -blocks, -potential)
+
+        return sorted(self.candidate_moves(state), key=priority)
+
+    def evaluate(self, state):
+        """
+        Score a position that was not searched to the end, from this player's side.
+        Lines still open to one player count 4 to the power of their marks.
+        The result is always between -1 and 1, below any won or lost score.
+        """
+        mine = state.line_counts[self.mark]
+        theirs = state.line_counts[state.opponent(self.mark)]
+        own = other = 0
+        for line in range(len(state.lines)):
+            if theirs[line] == 0 and mine[line] > 0:
+                own += 4**mine[line]
+            elif mine[line] == 0 and theirs[line] > 0:
+                other += 4**theirs[line]
+        return (own - other)/(own + other + 1)
+
+    def alphabeta_root(self, state, player, depth=None, first=None):
+        """
+        Search the children of the current position and return (score, position).
+        Moves are searched with the window lowered by one point, so equal
+        scores are exact and ties go to the lowest square like minimax.
+        The move first, if given, is searched before the others.
+        """
+        max_player = self.mark
+        min_player = state.opponent(player)
+        best_score = -math.inf if player == max_player else math.inf
+        best_pos = -1
+        child_depth = None if depth is None else depth - 1
+        moves = self.order_moves(state, player, min_player)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        for pos in moves:
+            state.make_move(player, pos)
             if player == max_player:
-                if sim_score["score"] > best["score"]:
-                    best = sim_score
+                score = self.alphabeta(state, min_player, best_score - 1, math.inf, child_depth)[0]
             else:
-                if sim_score["score"] < best["score"]:
-                    best = sim_score
+                score = self.alphabeta(state, min_player, -math.inf, best_score + 1, child_depth)[0]
+            state.undo_move(pos)
+
+            if score == best_score and pos < best_pos \
+                or (score > best_score if player == max_player else score < best_score):
+                best_score = score
+                best_pos = pos
+
+        return best_score, best_pos
+
+    def alphabeta(self, state, player, alpha, beta, depth=None):
+        """
+        Minimax with alpha-beta pruning, searching depth moves ahead
+        (to the end of the game if depth is None). Returns (score, position).
+        """
+        if self.cancelled:
+            raise SearchCancelled
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        max_player = self.mark
+        min_player = state.opponent(player)
+        empty = len(state.board.empty_square())
+
+        if state.check_winning() == min_player:
+            return (empty + 1 if min_player == max_player else -(empty + 1)), -1
+        elif empty == 0:
+            return 0, -1
+        if depth is None or depth > empty:
+            depth = empty
+        if depth == 0:
+            return self.evaluate(state), -1
+
+        alpha_orig = alpha
+        beta_orig = beta
+        if self.table is not None:
+            key, sym = canonical(state.board.cells())
+            entry = self.table.get((key, player))
+            if entry is not None and entry[3] >= depth:
+                pos, score, flag = entry[:3]
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                elif flag == UPPER:
+                    beta = min(beta, score)
+                if flag == EXACT or alpha >= beta:
+                    return score, from_canonical(pos, sym, state.width)
+
+        best_pos = -1
+        if player == max_player:
+            best_score = -math.inf
+            for pos in self.order_moves(state, player, min_player):
+                state.make_move(player, pos)
+                score = self.alphabeta(state, min_player, alpha, beta, depth - 1)[0]
+                state.undo_move(pos)
+                if score > best_score:
+                    best_score = score
+                    best_pos = pos
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        else:
+            best_score = math.inf
+            for pos in self.order_moves(state, player, min_player):
+                state.make_move(player, pos)
+                score = self.alphabeta(state, min_player, alpha, beta, depth - 1)[0]
+                state.undo_move(pos)
+                if score < best_score:
+                    best_score = score
+                    best_pos = pos
+                beta = min(beta, score)
+                if alpha >= beta:
+                    break
+
+        if self.table is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.table.put((key, player), (to_canonical(best_pos, sym, state.width), best_score, flag, depth))
+        return best_score, best_pos
+
+
+class TableAI(Player):
+    """
+    This class is a child class of player.
+    This class creates a computer player.
+    This computer player looks up the best move in the perfect play table
+    built by table.py, so every move takes constant time.
+    """
+    def __init__(self, mark, path=TABLE_PATH):
+        super().__init__(mark)
+        self.table = PerfectPlayTable(path)
+
+    def get_move(self, state):
+        if state.board.size != 9:
+            raise ValueError("The perfect play table only covers 3x3 boards.")
+        if len(state.board.empty_square()) == 9:
+            return random.choice(state.board.empty_square())
+
+        entry = self.table.lookup(state.board.cells(), self.mark)
+        if entry is None:
+            raise ValueError("Position is not in the perfect play table.")
+        return entry[1]
+
+
+class RemotePlayer(Player):
+    """
+    This class is a child class of player.
+    This class stands for an opponent connected through server.py.
+    Joining waits until the server pairs this client with someone;
+    the local player takes the mark the server gives, and this player the other one.
+    Moves made locally are sent before waiting for the opponent's reply.
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, width=3, k=None, timeout=None):
+        import socket
+
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.sock.makefile("rwb")
+        self.send({"type": "join", "width": width, "k": k})
+        message = self.receive()
+        while message["type"] == "waiting":
+            message = self.receive()
+        if message["type"] != "start":
+            raise ConnectionError("Could not join a match: %s" % message)
+        self.local_mark = message["mark"]
+        super().__init__(3 - self.local_mark)
+        self.synced = 0
+
+    def send(self, message):
+        self.stream.write(encode(message))
+        self.stream.flush()
+
+    def receive(self):
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        message = decode(line)
+        if message["type"] == "error":
+            raise ValueError(message["message"])
+        return message
+
+    def send_moves(self, state):
+        """ Send the moves made locally since the last call and wait for their echo. """
+        for pos in state.moves[self.synced:]:
+            self.send({"type": "move", "pos": pos})
+            message = self.receive()
+            if message["type"] != "move" or message["pos"] != pos:
+                raise ConnectionError("Unexpected message: %s" % message)
+            self.synced += 1
+
+    def get_move(self, state):
+        self.send_moves(state)
+        message = self.receive()
+        if message["type"] != "move" or message["mark"] != self.mark:
+            raise ConnectionError("Match ended: %s" % message)
+        self.synced += 1
+        return message["pos"]
+
+    def end_game(self, state):
+        self.send_moves(state)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+class MCTSNode:
+    """
+    This class is one position in the search tree of MCTSAI.
+    wins counts the playouts through it won by the player who made its move,
+    with a tie counting half.
+    """
+    def __init__(self, move=-1, player=0, parent=None, moves=()):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = []
+        self.untried = list(moves)
+        self.visits = 0
+        self.wins = 0.0
+
+    def uct_child(self, exploration):
+        """ Return the child with the highest upper confidence bound. """
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.wins/child.visits + exploration*math.sqrt(log_visits/child.visits))
+
+
+def mcts_visits(job):
+    """ Search a position in a worker process and return the visits of each move. """
+    import numpy as np
+
+    position, mark, playouts, time_budget, exploration, rollout_batch, seed = job
+    random.seed(seed)
+    player = MCTSAI(mark, playouts, time_budget, exploration, rollout_batch, reuse=False)
+    player.rng = np.random.default_rng(seed)
+    state = position.to_state()
+    root = player.new_root(state)
+    player.search(state, root)
+    return {child.move: child.visits for child in root.children}
+
+
+class MCTSAI(Player):
+    """
+    This class is a child class of player.
+    This class creates a computer player.
+    This computer player runs Monte Carlo tree search with UCT selection,
+    for playouts random games or, with a time_budget in seconds, until time runs out.
+    With a rollout_batch above 1, each new leaf is scored by that many random games
+    played at once with NumPy. With workers, the search is split across that many
+    processes, each growing its own tree, and their visit counts are added up.
+    With reuse, the subtree of the position reached is kept between moves.
+    """
+    def __init__(self, mark, playouts=1000, time_budget=None, exploration=math.sqrt(2), rollout_batch=1,
+                 workers=None, reuse=True):
+        super().__init__(mark)
+        self.playouts = playouts
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_batch = rollout_batch
+        self.workers = workers
+        self.reuse = reuse
+        self.executor = None
+        self.rng = None
+        self.root = None
+        self.root_moves = None
+        self.root_shape = None
+
+    center_squares = HardAI.center_squares
+    candidate_moves = HardAI.candidate_moves
+
+    def get_move(self, state):
+        if len(state.board.empty_square()) == state.board.size and state.board.size > 9:
+            return self.center_squares(state)[0]
+        if self.workers:
+            return self.parallel_search(state)
+
+        state = state.copy(bitboard=True)
+        root = self.reused_root(state) or self.new_root(state)
+        self.search(state, root)
+        best = self.best_child(root)
+        if self.reuse:
+            best.parent = None
+            self.root = best
+            self.root_moves = state.moves + [best.move]
+            self.root_shape = (state.board.size, state.k)
+        return best.move
+
+    def new_root(self, state):
+        return MCTSNode(player=state.opponent(self.mark), moves=self.candidate_moves(state))
+
+    def reused_root(self, state):
+        """ Return the kept subtree for this position, or None. """
+        if self.root is None or self.root_shape != (state.board.size, state.k) \
+                or len(state.moves) != state.board.size - len(state.board.empty_square()) \
+                or state.moves[:len(self.root_moves)] != self.root_moves:
+            return None
+        node = self.root
+        for pos in state.moves[len(self.root_moves):]:
+            node = next((child for child in node.children if child.move == pos), None)
+            if node is None:
+                return None
+        node.parent = None
+        return node
+
+    def best_child(self, root):
+        """ Return the most visited child, the lowest square on ties. """
+        return max(sorted(root.children, key=lambda child: child.move), key=lambda child: child.visits)
+
+    def search(self, state, root):
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        playouts = 0
+        while playouts < self.playouts if deadline is None else time.perf_counter() < deadline:
+            if self.cancelled:
+                raise SearchCancelled
+            node = root
+            path = []
+            while not node.untried and node.children:
+                node = node.uct_child(self.exploration)
+                state.make_move(node.player, node.move)
+                path.append(node.move)
+
+            if node.untried and state.winner == -1:
+                pos = node.untried.pop(random.randrange(len(node.untried)))
+                player = state.opponent(node.player)
+                state.make_move(player, pos)
+                path.append(pos)
+                child = MCTSNode(pos, player, node, self.candidate_moves(state) if state.winner == -1 else ())
+                node.children.append(child)
+                node = child
+
+            results = self.rollout(state, state.opponent(node.player))
+            count = sum(results)
+            while node is not None:
+                node.visits += count
+                node.wins += results[node.player] + 0.5*results[0]
+                node = node.parent
+            for pos in reversed(path):
+                state.undo_move(pos)
+            playouts += count
+
+    def rollout(self, state, player):
+        """ Play random games from the position and return the ties and wins of each player. """
+        results = [0, 0, 0]
+        if state.winner != -1:
+            results[state.winner] = self.rollout_batch
+            return results
+        if self.rollout_batch > 1:
+            import numpy as np
+            from batch import random_playouts
+
+            if self.rng is None:
+                self.rng = np.random.default_rng()
+            return np.bincount(random_playouts(state.board.cells(), player, self.rollout_batch, state.k, self.rng),
+                               minlength=3).tolist()
+
+        moves = state.board.empty_square()
+        random.shuffle(moves)
+        played = []
+        for pos in moves:
+            if state.winner != -1:
+                break
+            state.make_move(player, pos)
+            played.append(pos)
+            player = state.opponent(player)
+        results[max(state.winner, 0)] = 1
+        for pos in reversed(played):
+            state.undo_move(pos)
+        return results
+
+    def parallel_search(self, state):
+        """ Search from the same position in every worker and return the most visited move. """
+        if self.executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.executor = ProcessPoolExecutor(self.workers)
+        playouts = -(-self.playouts//self.workers)
+        position = Position.from_state(state)
+        jobs = [(position, self.mark, playouts, self.time_budget, self.exploration,
+                 self.rollout_batch, random.randrange(2**32)) for _ in range(self.workers)]
+        visits = Counter()
+        for result in self.executor.map(mcts_visits, jobs):
+            visits.update(result)
+        return max(sorted(visits), key=visits.get)
 
-        return best
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,164 @@
+import struct
+from lines import board_width, default_win_length
+
+# encode_positions writes a header of width and k, followed by one fixed-size
+# little-endian record per position: its packed int.
+HEADER = struct.Struct("<2B")
+
+
+def record_size(width):
+    """ Return the number of bytes of a packed position on a width x width board. """
+    return (2*width*width + 7)//8
+
+
+class Position:
+    """
+    This class is an immutable snapshot of the marks on a board, small enough
+    to send to worker processes and to use as a cache key.
+    Both players' bitmasks, as kept by BitBoard, are packed into one int:
+    player 1's in the low size bits and player 2's above them.
+    Positions are hashable, and pickle to their packed int, width and k.
+    """
+    __slots__ = ("packed", "width", "k")
+
+    def __init__(self, packed=0, width=3, k=None):
+        object.__setattr__(self, "packed", packed)
+        object.__setattr__(self, "width", width)
+        object.__setattr__(self, "k", k or default_win_length(width))
+
+    @classmethod
+    def from_masks(cls, mask1, mask2, width=3, k=None):
+        return cls(mask1 | mask2 << width*width, width, k)
+
+    @classmethod
+    def from_cells(cls, cells, k=None):
+        """ Build a position from the marks of all squares, as returned by Board.cells. """
+        mask1 = mask2 = 0
+        for pos, cell in enumerate(cells):
+            if cell == 1:
+                mask1 |= 1 << pos
+            elif cell == 2:
+                mask2 |= 1 << pos
+        return cls.from_masks(mask1, mask2, board_width(len(cells)), k)
+
+    @classmethod
+    def from_board(cls, board, k=None):
+        """ Build a position from a Board or, without copying any squares, a BitBoard. """
+        masks = getattr(board, "masks", None)
+        if masks is None:
+            return cls.from_cells(board.cells(), k)
+        return cls.from_masks(masks[1], masks[2], board.width, k or board.k)
+
+    @classmethod
+    def from_state(cls, state):
+        return cls.from_board(state.board, state.k)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        return Position, (self.packed, self.width, self.k)
+
+    def __eq__(self, other):
+        if not isinstance(other, Position):
+            return NotImplemented
+        return self.packed == other.packed and self.width == other.width and self.k == other.k
+
+    def __hash__(self):
+        return hash((self.packed, self.width, self.k))
+
+    def __repr__(self):
+        return "Position(%d, width=%d, k=%d)" % (self.packed, self.width, self.k)
+
+    @property
+    def size(self):
+        return self.width*self.width
+
+    def mask(self, player):
+        """ Return the bitmask of a player's marks. """
+        size = self.width*self.width
+        if player == 1:
+            return self.packed & ((1 << size) - 1)
+        return self.packed >> size
+
+    def cell(self, pos):
+        """ Return the mark in a square, 0 if it is empty. """
+        if self.packed >> pos & 1:
+            return 1
+        if self.packed >> (pos + self.width*self.width) & 1:
+            return 2
+        return 0
+
+    def cells(self):
+        """ Return the marks of all squares as a tuple of ints. """
+        return tuple(self.cell(pos) for pos in range(self.width*self.width))
+
+    def marks(self):
+        """ Return the number of marks on the board. """
+        return bin(self.packed).count("1")
+
+    def to_board(self, bitboard=True):
+        """ Return a new BitBoard, or with bitboard=False a Board, holding these marks. """
+        if bitboard:
+            from bitboard import BitBoard
+
+            board = BitBoard(self.width*self.width, self.k)
+            board.masks[1] = self.mask(1)
+            board.masks[2] = self.mask(2)
+            return board
+        from engine import Board
+
+        board = Board(self.width*self.width)
+        for pos, cell in enumerate(self.cells()):
+            if cell:
+                board.place_move(cell, pos)
+        return board
+
+    def to_state(self, bitboard=True):
+        """ Return a new game state holding these marks, with its line counts and winner. """
+        from engine import GameState
+
+        state = GameState(self.width*self.width, bitboard=bitboard, k=self.k)
+        for pos, cell in enumerate(self.cells()):
+            if cell:
+                state.make_move(cell, pos)
+        return state
+
+    def to_bytes(self):
+        return self.packed.to_bytes(record_size(self.width), "little")
+
+    @classmethod
+    def from_bytes(cls, data, width=3, k=None):
+        return cls(int.from_bytes(data, "little"), width, k)
+
+
+def encode_positions(positions, width=None, k=None):
+    """
+    Pack positions of one board shape into bytes: a header of width and k,
+    then record_size(width) bytes per position.
+    width and k default to those of the first position, or 3x3.
+    """
+    positions = list(positions)
+    if width is None:
+        width = positions[0].width if positions else 3
+    if k is None:
+        k = positions[0].k if positions else default_win_length(width)
+    size = record_size(width)
+    parts = [HEADER.pack(width, k)]
+    for position in positions:
+        if position.width != width or position.k != k:
+            raise ValueError("Positions of different boards cannot be encoded together")
+        parts.append(position.packed.to_bytes(size, "little"))
+    return b"".join(parts)
+
+
+def decode_positions(data):
+    """ Return the list of positions packed by encode_positions. """
+    width, k = HEADER.unpack_from(data)
+    size = record_size(width)
+    view = memoryview(data)
+    return [Position(int.from_bytes(view[offset:offset + size], "little"), width, k)
+            for offset in range(HEADER.size, len(data), size)]
@@ -0,0 +1,20 @@
+import json
+
+# Messages are JSON objects, one per line.
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8765
+MAX_LINE = 4096
+# Board widths a match can be played on; 15x15 is the largest a game record holds.
+MIN_WIDTH = 3
+MAX_WIDTH = 15
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+def decode(line):
+    message = json.loads(line)
+    if not isinstance(message, dict) or "type" not in message:
+        raise ValueError("Message must be a JSON object with a type.")
+    return message
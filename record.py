@@ -0,0 +1,194 @@
+import mmap
+import os
+import struct
+import sys
+from collections import Counter, namedtuple
+
+# A log starts with MAGIC and holds one record per finished game:
+# mode, player 1, player 2, width, k and move count (one byte each),
+# one byte per move in the order played, and the result.
+# The index file next to it holds the 8-byte offset of every record.
+MAGIC = b"TTG1"
+HEADER = struct.Struct("<6B")
+OFFSET = struct.Struct("<Q")
+TIE = 0
+UNFINISHED = 255
+
+MODES = ("Headless", "Human vs. Human", "EasyAI vs. Human", "HardAI vs. Human")
+PLAYER_KINDS = ("other", "human", "easy", "hard", "table", "remote", "mcts")
+PLAYER_CLASSES = {"HumanPlayer": 1, "EasyAI": 2, "HardAI": 3, "TableAI": 4, "RemotePlayer": 5, "MCTSAI": 6}
+
+GameRecord = namedtuple("GameRecord", "mode players width k moves result")
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def player_kind(player):
+    """ Return the record code of a player object. """
+    return PLAYER_CLASSES.get(type(player).__name__, 0)
+
+
+def pack_record(mode, players, width, k, moves, result):
+    """ Return the bytes of one game record. """
+    if width*width > 255:
+        raise ValueError("Game records hold boards of up to 15x15, got %dx%d" % (width, width))
+    return HEADER.pack(mode, players[0], players[1], width, k, len(moves)) + bytes(moves) + bytes([result])
+
+
+def unpack_record(data, offset):
+    """ Return the record at offset and the offset of the next one. """
+    mode, player1, player2, width, k, count = HEADER.unpack_from(data, offset)
+    start = offset + HEADER.size
+    moves = bytes(data[start:start + count])
+    result = data[start + count]
+    return GameRecord(mode, (player1, player2), width, k, moves, result), start + count + 1
+
+
+class GameRecorder:
+    """
+    This class appends finished games to a game log.
+    Set it as the recorder of a GameState: every move made is passed to record,
+    and a record is written once the game is over.
+    Games left before the end are not written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.log = open(path, "ab")
+        if self.log.tell() == 0:
+            self.log.write(MAGIC)
+        self.index = open(index_path(path), "ab")
+        self.mode = 0
+        self.players = (0, 0)
+        self.games = 0
+
+    def start(self, mode, player1, player2):
+        """ Set the mode name and players of the games that follow. """
+        self.mode = MODES.index(mode)
+        self.players = (player_kind(player1), player_kind(player2))
+
+    def record(self, state):
+        if state.is_over():
+            self.write(state)
+
+    def write(self, state):
+        result = state.winner if state.winner != -1 else (TIE if state.is_tie() else UNFINISHED)
+        self.index.write(OFFSET.pack(self.log.tell()))
+        self.log.write(pack_record(self.mode, self.players, state.width, state.k, state.moves, result))
+        self.games += 1
+
+    def flush(self):
+        self.log.flush()
+        self.index.flush()
+
+    def close(self):
+        self.log.close()
+        self.index.close()
+
+
+class GameLog:
+    """
+    This class maps a game log into memory and streams its records.
+    Games are read one at a time, so a log of any size can be scanned.
+    The index gives the offset of any game without reading those before it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = b""
+        self.offsets = b""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > len(MAGIC):
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data and self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError("%s is not a game log" % path)
+        if os.path.exists(index_path(path)):
+            with open(index_path(path), "rb") as f:
+                if os.fstat(f.fileno()).st_size >= OFFSET.size:
+                    self.offsets = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        """ Return the number of indexed games written in full. """
+        count = len(self.offsets)//OFFSET.size
+        while count and self.offset(count - 1) >= len(self.data):
+            count -= 1
+        return count
+
+    def offset(self, number):
+        return OFFSET.unpack_from(self.offsets, number*OFFSET.size)[0]
+
+    def game(self, number):
+        """ Return one game by its number in the log. """
+        if not 0 <= number < len(self):
+            raise IndexError("No game %d in %s" % (number, self.path))
+        return unpack_record(self.data, self.offset(number))[0]
+
+    def games(self, start=0, stop=None):
+        """ Yield games in order from game number start, without using the index after it. """
+        if start and start >= len(self):
+            return
+        offset = self.offset(start) if start else len(MAGIC)
+        number = start
+        while offset + HEADER.size <= len(self.data) and (stop is None or number < stop):
+            # A record still being written is left for the next scan.
+            count = self.data[offset + HEADER.size - 1]
+            if offset + HEADER.size + count + 1 > len(self.data):
+                break
+            record, offset = unpack_record(self.data, offset)
+            number += 1
+            yield record
+
+    def close(self):
+        for data in (self.data, self.offsets):
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def merge(path, parts):
+    """ Append the games of other logs to the log at path and remove them. """
+    with open(path, "ab") as log, open(index_path(path), "ab") as index:
+        if log.tell() == 0:
+            log.write(MAGIC)
+        for part in parts:
+            with open(part, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError("%s is not a game log" % part)
+                data = f.read()
+            base = log.tell() - len(MAGIC)
+            log.write(data)
+            with open(index_path(part), "rb") as f:
+                offsets = f.read()
+            for (offset,) in OFFSET.iter_unpack(offsets):
+                index.write(OFFSET.pack(base + offset))
+            os.remove(part)
+            os.remove(index_path(part))
+
+
+def statistics(games):
+    """ Return the number of games, results and average length of a stream of games. """
+    results = Counter()
+    moves = 0
+    for game in games:
+        results[game.result] += 1
+        moves += len(game.moves)
+    count = sum(results.values())
+    return {
+        "games": count,
+        "player1_wins": results[1],
+        "draws": results[TIE],
+        "player2_wins": results[2],
+        "unfinished": results[UNFINISHED],
+        "average_moves": moves/count if count else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python record.py LOG")
+    log = GameLog(sys.argv[1])
+    report = statistics(log.games())
+    print("%d games, %.1f moves on average" % (report["games"], report["average_moves"]))
+    print("player 1 wins: %d  draws: %d  player 2 wins: %d" % (
+        report["player1_wins"], report["draws"], report["player2_wins"]))
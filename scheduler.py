@@ -0,0 +1,32 @@
+import pygame
+
+
+class Scheduler:
+    """
+    This class paces the main loop.
+    While something is animating, frames are capped at fps.
+    When idle, it sleeps until an event arrives instead of spinning,
+    waking up at least every idle_timeout milliseconds.
+    """
+
+    def __init__(self, fps=30, idle=True, idle_timeout=1000):
+        self.fps = fps
+        self.idle = idle
+        self.idle_timeout = idle_timeout
+        self.clock = pygame.time.Clock()
+
+    def events(self, busy=False):
+        """
+        Return the pending events.
+        Blocks until one arrives unless busy is True or idle mode is off,
+        in which case it waits for the next frame instead.
+        """
+        if busy or not self.idle:
+            self.clock.tick(self.fps)
+            return pygame.event.get()
+
+        event = pygame.event.wait(self.idle_timeout)
+        events = pygame.event.get()
+        if event.type != pygame.NOEVENT:
+            events.insert(0, event)
+        return events
@@ -0,0 +1,151 @@
+from functools import lru_cache
+from lines import winning_lines, lines_through
+from transposition import symmetries, inverses
+
+# The search core returns a score and a square packed into one int:
+# the score in the high bits and the square in the low MOVE_BITS bits.
+MOVE_BITS = 8
+MOVE_MASK = (1 << MOVE_BITS) - 1
+# Worse than any score, and still an int.
+INFINITY = 1 << 20
+
+
+def pack(score, pos):
+    return (score << MOVE_BITS) | pos
+
+
+def unpack(packed):
+    """ Return (score, square) of a packed search result. """
+    return packed >> MOVE_BITS, packed & MOVE_MASK
+
+
+@lru_cache(maxsize=None)
+def square_powers(size):
+    """ Return the base-3 place value of each square, the first square being the most significant. """
+    return tuple(3**(size - 1 - pos) for pos in range(size))
+
+
+class SearchBoard:
+    """
+    This class holds the position for the search core in structures made once:
+    a list of cells, each player's marks on every line, the base-3 key of the
+    board under each of its 8 symmetries and a move stack with room for the moves
+    of every level of the search. Placing and removing a mark changes them in
+    place, so searching a node allocates no lists, tuples or dicts. Its loops are
+    while loops for the same reason: a for loop over a tuple makes an iterator.
+    The smallest key is the canonical hash of transposition.canonical.
+    With symmetric=False no keys are kept, for searches without a cache.
+    """
+
+    def __init__(self, width, k, symmetric=True):
+        self.size = width*width
+        self.full = (1 << self.size) - 1
+        self.k = k
+        self.shape = (self.size, k, symmetric)
+        self.lines_through = lines_through(width, k)
+        self.symmetries = symmetries(width)
+        self.inverses = inverses(width)
+        powers = square_powers(self.size)
+        # weights[sym][pos] is what a mark of 1 on square pos adds to the key under symmetry sym.
+        self.weights = tuple(tuple(powers[inverse[pos]] for pos in range(self.size))
+                             for inverse in self.inverses) if symmetric else ()
+        lines = len(winning_lines(width, k))
+        self.cells = [0]*self.size
+        self.counts = [None, [0]*lines, [0]*lines]
+        self.stack = [0]*(self.size*(self.size + 1)//2)
+        self.keys = [0]*len(self.weights)
+
+    def load(self, state):
+        """ Copy the marks and line counts of a game state. """
+        self.counts[1][:] = state.line_counts[1]
+        self.counts[2][:] = state.line_counts[2]
+        self.keys[:] = [0]*len(self.weights)
+        for pos in range(self.size):
+            cell = state.board.cell(pos)
+            self.cells[pos] = cell
+            if cell:
+                for sym, weights in enumerate(self.weights):
+                    self.keys[sym] += cell*weights[pos]
+
+    def canonical(self):
+        """ Return the symmetry giving the smallest key, the first one if several do. """
+        keys = self.keys
+        best = sym = len(keys) - 1
+        while sym:
+            sym -= 1
+            if keys[sym] <= keys[best]:
+                best = sym
+        return best
+
+    def to_canonical(self, mask, sym):
+        """ Map a bitmask of squares onto the board of a symmetry. """
+        inverse = self.inverses[sym]
+        result = 0
+        pos = 0
+        while mask:
+            if mask & 1:
+                result |= 1 << inverse[pos]
+            mask >>= 1
+            pos += 1
+        return result
+
+    def lowest_from_canonical(self, mask, sym):
+        """ Return the lowest square of the board among a bitmask of squares of a symmetry. """
+        squares = self.symmetries[sym]
+        lowest = self.size
+        pos = 0
+        while mask:
+            if mask & 1 and squares[pos] < lowest:
+                lowest = squares[pos]
+            mask >>= 1
+            pos += 1
+        return lowest
+
+    def generate(self, top):
+        """ Write the empty squares to the move stack from top; returns the end of them. """
+        cells = self.cells
+        stack = self.stack
+        size = self.size
+        pos = 0
+        while pos < size:
+            if not cells[pos]:
+                stack[top] = pos
+                top += 1
+            pos += 1
+        return top
+
+    def place(self, player, pos):
+        """ Put a mark on a square; returns True if it completes a line. """
+        self.cells[pos] = player
+        keys = self.keys
+        weights = self.weights
+        sym = len(keys)
+        while sym:
+            sym -= 1
+            keys[sym] += player*weights[sym][pos]
+        counts = self.counts[player]
+        lines = self.lines_through[pos]
+        won = False
+        i = len(lines)
+        while i:
+            i -= 1
+            line = lines[i]
+            counts[line] += 1
+            if counts[line] == self.k:
+                won = True
+        return won
+
+    def remove(self, player, pos):
+        self.cells[pos] = 0
+        keys = self.keys
+        weights = self.weights
+        sym = len(keys)
+        while sym:
+            sym -= 1
+            keys[sym] -= player*weights[sym][pos]
+        counts = self.counts[player]
+        lines = self.lines_through[pos]
+        i = len(lines)
+        while i:
+            i -= 1
+            counts[lines[i]] -= 1
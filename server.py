@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import itertools
+from engine import GameState
+from lines import default_win_length
+from protocol import DEFAULT_HOST, DEFAULT_PORT, MAX_LINE, MIN_WIDTH, MAX_WIDTH, encode, decode
+
+# Client messages:
+#   {"type": "join", "width": 3, "k": 3}    wait for an opponent on that board
+#   {"type": "move", "pos": 4}              play a square in the current match
+# Server messages:
+#   {"type": "waiting"}
+#   {"type": "start", "match": 1, "mark": 1, "width": 3, "k": 3}
+#   {"type": "move", "mark": 1, "pos": 4}   sent to both players
+#   {"type": "end", "winner": 1}            winner is -1 for a tie
+#   {"type": "error", "message": "..."}
+
+
+class Client:
+    """
+    This class is one connection to the server.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.mark = -1
+
+    def send(self, message):
+        self.writer.write(encode(message))
+
+
+class Match:
+    """
+    This class is one game between two connected clients, using the GameState rules.
+    """
+
+    def __init__(self, match_id, width, k, clients):
+        self.match_id = match_id
+        self.state = GameState(width*width, bitboard=True, k=k)
+        self.state.player = 1
+        self.clients = clients
+
+    def broadcast(self, message):
+        for client in self.clients.values():
+            client.send(message)
+
+
+class GameServer:
+    """
+    This class hosts many concurrent matches in one asyncio event loop.
+    Players joining with the same board settings are paired in arrival order.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        self.waiting = {}
+        self.matches = {}
+        self.match_ids = itertools.count(1)
+        self.games_finished = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=MAX_LINE)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        client = Client(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line was longer than MAX_LINE; the reader has dropped it.
+                    client.send({"type": "error", "message": "Messages must be shorter than %d bytes." % MAX_LINE})
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                try:
+                    message = decode(line)
+                    self.handle_message(client, message)
+                except (ValueError, KeyError, TypeError) as error:
+                    client.send({"type": "error", "message": str(error)})
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.leave(client)
+            writer.close()
+
+    def handle_message(self, client, message):
+        if message["type"] == "join":
+            self.join(client, int(message.get("width") or 3), message.get("k"))
+        elif message["type"] == "move":
+            self.move(client, message["pos"])
+        else:
+            raise ValueError("Unknown message type: %s" % message["type"])
+
+    def join(self, client, width, k):
+        if client.match is not None:
+            raise ValueError("Already playing a match.")
+        if not MIN_WIDTH <= width <= MAX_WIDTH:
+            raise ValueError("Board width must be between %d and %d, got %d" % (MIN_WIDTH, MAX_WIDTH, width))
+        k = int(k) if k else default_win_length(width)
+        if not 1 <= k <= width:
+            raise ValueError("Win length must be between 1 and %d, got %d" % (width, k))
+        key = (width, k)
+        opponent = self.waiting.pop(key, None)
+        if opponent is None or opponent is client:
+            self.waiting[key] = client
+            client.send({"type": "waiting"})
+            return
+
+        match = Match(next(self.match_ids), width, k, {1: opponent, 2: client})
+        self.matches[match.match_id] = match
+        for mark, player in match.clients.items():
+            player.match = match
+            player.mark = mark
+            player.send({"type": "start", "match": match.match_id, "mark": mark,
+                         "width": width, "k": match.state.k})
+
+    def move(self, client, pos):
+        match = client.match
+        if match is None:
+            raise ValueError("Not in a match.")
+        state = match.state
+        if state.player != client.mark:
+            raise ValueError("Not your turn.")
+        if not isinstance(pos, int) or not 0 <= pos < state.board.size or not state.legal_move(client.mark, pos):
+            raise ValueError("Illegal move: %s" % pos)
+
+        state.play(pos)
+        match.broadcast({"type": "move", "mark": client.mark, "pos": pos})
+        if state.is_over():
+            match.broadcast({"type": "end", "winner": state.winner})
+            self.finish(match)
+
+    def finish(self, match):
+        self.matches.pop(match.match_id, None)
+        self.games_finished += 1
+        for player in match.clients.values():
+            player.match = None
+            player.mark = -1
+
+    def leave(self, client):
+        for key, waiting in list(self.waiting.items()):
+            if waiting is client:
+                del self.waiting[key]
+        match = client.match
+        if match is not None:
+            for mark, player in match.clients.items():
+                if player is not client:
+                    player.send({"type": "end", "winner": mark, "reason": "opponent left"})
+            self.finish(match)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host networked Tic Tac Toe matches.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port)
+    print("Serving on %s:%d" % (args.host, args.port))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from player import HardAI
+from position import Position
+from transposition import TranspositionTable, canonical, symmetries, from_canonical
+
+# Players kept in each worker, so their transposition tables stay warm between batches.
+_solvers = {}
+
+
+def solve_batch(jobs):
+    """ Return the best move for each (position, player, depth) job. Runs in a worker. """
+    moves = []
+    for position, player, depth in jobs:
+        solver = _solvers.get((player, depth))
+        if solver is None:
+            solver = _solvers[(player, depth)] = HardAI(player, bitboard=True, search="alphabeta", depth=depth)
+        moves.append(solver.get_move(position.to_state()))
+    return moves
+
+
+class EvaluationService:
+    """
+    This class answers best-move requests for many HardAI players at once.
+    Positions are keyed by their canonical board, so identical and symmetric
+    positions share one cache entry and one search.
+    Requests for a position already being searched wait for that search.
+    Cache misses are sent to a pool of worker processes in batches of up to batch_size,
+    collected for at most batch_delay seconds.
+    depth limits every search as in HardAI; None searches to the end of the game.
+    """
+
+    def __init__(self, workers=None, cache_size=100000, depth=None, batch_size=64, batch_delay=0.002,
+                 processes=True):
+        self.depth = depth
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.cache = TranspositionTable(cache_size)
+        self.pending = {}
+        self.queue = []
+        self.in_flight = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.closed = False
+        self.executor = ProcessPoolExecutor(workers) if processes else ThreadPoolExecutor(workers)
+        self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def best_move(self, state, player):
+        """ Return the best move for player, blocking until it is known. """
+        cells = state.board.cells()
+        width = state.width
+        key, sym = canonical(cells)
+        key = (key, player, width, state.k)
+        with self.lock:
+            self.requests += 1
+            pos = self.cache.get(key)
+            if pos is not None:
+                return from_canonical(pos, sym, width)
+            future = self.pending.get(key)
+            if future is None:
+                future = self.pending[key] = Future()
+                position = Position.from_cells([cells[square] for square in symmetries(width)[sym]], state.k)
+                self.queue.append((key, (position, player, self.depth)))
+                self.ready.notify()
+            else:
+                self.coalesced += 1
+        return from_canonical(future.result(), sym, width)
+
+    def dispatch(self):
+        """ Send queued positions to the workers in batches. """
+        while True:
+            with self.lock:
+                while not self.queue and not self.closed:
+                    self.ready.wait()
+                deadline = time.perf_counter() + self.batch_delay
+                while len(self.queue) < self.batch_size and not self.closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.ready.wait(remaining)
+                if self.closed:
+                    batch = self.queue
+                    self.queue = []
+                else:
+                    batch = self.queue[:self.batch_size]
+                    del self.queue[:self.batch_size]
+                self.in_flight += len(batch)
+                self.batches += 1
+            keys = [key for key, _ in batch]
+            if self.closed:
+                self.finish(keys, error=RuntimeError("The evaluation service is closed."))
+                return
+            result = self.executor.submit(solve_batch, [job for _, job in batch])
+            result.add_done_callback(lambda result, keys=keys: self.finish(keys, result))
+
+    def finish(self, keys, result=None, error=None):
+        """ Cache the moves of a finished batch and wake the requests waiting on them. """
+        if error is None:
+            error = result.exception()
+        moves = result.result() if error is None else [None]*len(keys)
+        with self.lock:
+            self.in_flight -= len(keys)
+            futures = [self.pending.pop(key) for key in keys]
+            if error is None:
+                for key, pos in zip(keys, moves):
+                    self.cache.put(key, pos)
+        for future, pos in zip(futures, moves):
+            if error is None:
+                future.set_result(pos)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        """ Return the request counts, queue depth and cache hit rate. """
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "cache_hits": self.cache.hits,
+                "hit_rate": self.cache.hits/self.requests if self.requests else 0.0,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "queue_depth": len(self.queue),
+                "in_flight": self.in_flight,
+                "cache_size": len(self.cache),
+            }
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.ready.notify()
+        self.dispatcher.join()
+        self.executor.shutdown()
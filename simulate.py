@@ -0,0 +1,145 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from engine import GameState
+from player import EasyAI, HardAI, TableAI, MCTSAI
+from record import GameRecorder, merge
+
+PLAYERS = {
+    "easy": EasyAI,
+    "hard": HardAI,
+    "alphabeta": lambda mark: HardAI(mark, bitboard=True, search="alphabeta"),
+    "table": TableAI,
+    "heuristic": lambda mark: HardAI(mark, bitboard=True, search="alphabeta", depth=2),
+    "mcts": lambda mark: MCTSAI(mark, playouts=500),
+}
+
+# Move latencies are counted in buckets 5% wide, so percentiles
+# can be merged across workers without keeping every sample.
+BUCKET_BASE = 1.05
+
+
+def latency_bucket(seconds):
+    return int(math.log(max(seconds, 1e-9)*1e9, BUCKET_BASE))
+
+
+def bucket_seconds(bucket):
+    return BUCKET_BASE**bucket/1e9
+
+
+def play_game(state, players):
+    """ Play one headless game and return the winner (0 for a tie) and move latencies. """
+    state.reset()
+    state.player = 1
+    latencies = []
+    while not state.is_over():
+        start = time.perf_counter()
+        pos = players[state.player].get_move(state)
+        latencies.append(time.perf_counter() - start)
+        state.play(pos)
+    for player in players.values():
+        player.end_game(state)
+    return (state.winner if state.winner != -1 else 0), latencies
+
+
+def play_games(job):
+    """ Play a batch of games in a worker process, recording them to the given log path if any. """
+    player1, player2, games, seed, size, k, record = job
+    random.seed(seed)
+    state = GameState(size, bitboard=True, k=k)
+    players = {1: PLAYERS[player1](1), 2: PLAYERS[player2](2)}
+    if record is not None:
+        state.recorder = GameRecorder(record)
+        state.recorder.start("Headless", players[1], players[2])
+    results = Counter()
+    latencies = Counter()
+    for _ in range(games):
+        winner, move_latencies = play_game(state, players)
+        results[winner] += 1
+        for latency in move_latencies:
+            latencies[latency_bucket(latency)] += 1
+    if record is not None:
+        state.recorder.close()
+    return results, latencies
+
+
+def percentile(latencies, fraction):
+    """ Return the latency in seconds below which the given fraction of moves fall. """
+    target = fraction*sum(latencies.values())
+    seen = 0
+    for bucket in sorted(latencies):
+        seen += latencies[bucket]
+        if seen >= target:
+            return bucket_seconds(bucket)
+    return 0.0
+
+
+def simulate(player1, player2, games, workers=None, chunk_size=1000, seed=0, size=9, k=None, record=None):
+    """
+    Play games between two players across a process pool and return a report.
+    With a record path, the games are appended to that game log.
+    """
+    if games < 1:
+        raise ValueError("Number of games must be at least 1, got %d" % games)
+    jobs = []
+    remaining = games
+    while remaining > 0:
+        part = None if record is None else "%s.part%d" % (record, len(jobs))
+        jobs.append((player1, player2, min(chunk_size, remaining), seed + len(jobs), size, k, part))
+        remaining -= chunk_size
+
+    results = Counter()
+    latencies = Counter()
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_results, chunk_latencies in pool.imap_unordered(play_games, jobs):
+            results.update(chunk_results)
+            latencies.update(chunk_latencies)
+    elapsed = time.perf_counter() - start
+    if record is not None:
+        merge(record, [job[-1] for job in jobs if os.path.exists(job[-1])])
+
+    return {
+        "games": games,
+        "player1_wins": results[1]/games,
+        "draws": results[0]/games,
+        "player2_wins": results[2]/games,
+        "games_per_second": games/elapsed,
+        "move_latency_p50": percentile(latencies, 0.50),
+        "move_latency_p90": percentile(latencies, 0.90),
+        "move_latency_p99": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games between two players.")
+    parser.add_argument("player1", choices=sorted(PLAYERS))
+    parser.add_argument("player2", choices=sorted(PLAYERS))
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=3, help="squares on a side of the board")
+    parser.add_argument("-k", type=int, default=None, help="marks in a row needed to win")
+    parser.add_argument("--record", default=None, help="append the games to this game log")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    report = simulate(args.player1, args.player2, args.games, args.workers, args.chunk_size, args.seed,
+                      args.width*args.width, args.k, args.record)
+    print("%d games, %.0f games/s" % (report["games"], report["games_per_second"]))
+    print("%s wins: %.1f%%  draws: %.1f%%  %s wins: %.1f%%" % (
+        args.player1, 100*report["player1_wins"], 100*report["draws"],
+        args.player2, 100*report["player2_wins"]))
+    print("move latency p50: %.1f us  p90: %.1f us  p99: %.1f us" % (
+        1e6*report["move_latency_p50"], 1e6*report["move_latency_p90"], 1e6*report["move_latency_p99"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import mmap
+import os
+import sys
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect_play.table")
+MAGIC = b"TTT1"
+POSITIONS = 3**9
+EMPTY_ENTRY = 255
+MAX_SCORE = 10
+
+
+def board_index(cells):
+    """ Return the base-3 index of a board. """
+    index = 0
+    for cell in cells:
+        index = index*3 + cell
+    return index
+
+
+def entry_offset(cells, player):
+    """ Return the file offset of the entry for a board and the player to move. """
+    return len(MAGIC) + (player - 1)*POSITIONS + board_index(cells)
+
+
+def pack_entry(score, pos):
+    """ Pack a score (from the mover's point of view) and a move into one byte. """
+    return (score + MAX_SCORE)*9 + pos
+
+
+def unpack_entry(value):
+    """ Return (score, position) stored in one byte, or None if the entry is empty. """
+    if value == EMPTY_ENTRY:
+        return None
+    return value//9 - MAX_SCORE, value % 9
+
+
+class PerfectPlayTable:
+    """
+    This class maps the perfect play table file into memory and looks up positions.
+    Each reachable position has one byte, indexed by the base-3 number
+    of the board and the player to move.
+    """
+
+    def __init__(self, path=TABLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError("%s is not a perfect play table" % path)
+
+    def lookup(self, cells, player):
+        """ Return (score, position) for the player to move, or None. """
+        return unpack_entry(self.data[entry_offset(cells, player)])
+
+    def close(self):
+        self.data.close()
+
+
+def build_table(path=TABLE_PATH):
+    """ Solve every reachable position with HardAI and write the table to path. """
+    from engine import GameState
+    from player import HardAI
+
+    state = GameState(bitboard=True)
+    oracles = {1: HardAI(1, search="alphabeta"), 2: HardAI(2, search="alphabeta")}
+    data = bytearray([EMPTY_ENTRY])*(2*POSITIONS)
+    seen = set()
+
+    def solve(player):
+        cells = state.board.cells()
+        if (cells, player) in seen:
+            return
+        seen.add((cells, player))
+        if state.is_over():
+            return
+
+        score, pos = oracles[player].alphabeta_root(state, player)
+        data[(player - 1)*POSITIONS + board_index(cells)] = pack_entry(score, pos)
+
+        for pos in state.board.empty_square():
+            state.make_move(player, pos)
+            solve(3 - player)
+            state.undo_move(pos)
+
+    solve(1)
+    solve(2)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(data)
+    return len(seen)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else TABLE_PATH
+    count = build_table(path)
+    print("Wrote %d positions to %s" % (count, path))
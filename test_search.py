@@ -0,0 +1,131 @@
+import random
+import unittest
+from engine import GameState
+from player import HardAI
+
+
+def reachable_positions(mover):
+    """ Return every reachable 3x3 position, not yet over, where mover is to move. """
+    state = GameState(bitboard=True)
+    seen = set()
+    positions = []
+
+    def walk(player):
+        cells = state.board.cells()
+        if (cells, player) in seen:
+            return
+        seen.add((cells, player))
+        if state.is_over():
+            return
+        if player == mover:
+            positions.append(cells)
+        for pos in state.legal_moves():
+            state.make_move(player, pos)
+            walk(3 - player)
+            state.undo_move(pos)
+
+    walk(1)
+    walk(2)
+    return positions
+
+
+class SearchTest(unittest.TestCase):
+    """
+    This class checks that every search of HardAI finds the same score and move
+    as plain minimax without a cache, on every reachable 3x3 position.
+    """
+
+    def test_searches_agree(self):
+        state = GameState(bitboard=True)
+        for mark in (1, 2):
+            for mover in (1, 2):
+                reference = HardAI(mark, cache_size=0)
+                players = {
+                    "minimax": HardAI(mark),
+                    "alphabeta": HardAI(mark, search="alphabeta"),
+                    "alphabeta without cache": HardAI(mark, search="alphabeta", cache_size=0),
+                }
+                for cells in reachable_positions(mover):
+                    state.reset()
+                    for pos, cell in enumerate(cells):
+                        if cell:
+                            state.make_move(cell, pos)
+                    expected = reference.minimax(state, mover)
+                    expected = (expected["score"], expected["position"])
+                    for name, player in players.items():
+                        if player.search == "alphabeta":
+                            found = player.alphabeta_root(state, mover)
+                        else:
+                            found = player.minimax(state, mover)
+                            found = (found["score"], found["position"])
+                        self.assertEqual(found, expected, "%s, mark %d, %d to move, %s" % (name, mark, mover, cells))
+
+    def test_minimax_and_alphabeta_share_a_table(self):
+        state = GameState(bitboard=True)
+        reference = HardAI(2, cache_size=0)
+        player = HardAI(2)
+        for cells in reachable_positions(2)[::10]:
+            state.reset()
+            for pos, cell in enumerate(cells):
+                if cell:
+                    state.make_move(cell, pos)
+            expected = reference.minimax(state, 2)
+            expected = (expected["score"], expected["position"])
+            for _ in range(2):
+                found = player.minimax(state, 2)
+                self.assertEqual((found["score"], found["position"]), expected, cells)
+                self.assertEqual(player.alphabeta_root(state, 2), expected, cells)
+
+
+class ParallelSearchTest(unittest.TestCase):
+    """
+    This class checks that HardAI with workers finds the same score and move
+    as the serial searches.
+    """
+
+    def load(self, state, cells):
+        state.reset()
+        for pos, cell in enumerate(cells):
+            if cell:
+                state.make_move(cell, pos)
+
+    def test_parallel_matches_serial_on_3x3(self):
+        state = GameState(bitboard=True)
+        for search in ("minimax", "alphabeta"):
+            parallel = HardAI(1, search=search, workers=2)
+            serial = HardAI(1, search=search, cache_size=0)
+            try:
+                for mover in (1, 2):
+                    for cells in reachable_positions(mover)[::5]:
+                        self.load(state, cells)
+                        if search == "alphabeta":
+                            expected = serial.alphabeta_root(state, mover)
+                        else:
+                            expected = serial.minimax(state, mover)
+                            expected = (expected["score"], expected["position"])
+                        self.assertEqual(parallel.parallel_root(state, mover), expected,
+                                         "%s, %d to move, %s" % (search, mover, cells))
+            finally:
+                parallel.close()
+
+    def test_parallel_matches_serial_with_depth(self):
+        rng = random.Random(3)
+        depth = 2
+        parallel = HardAI(1, search="alphabeta", depth=depth, cache_size=0, workers=2)
+        serial = HardAI(1, search="alphabeta", depth=depth, cache_size=0)
+        try:
+            for _ in range(8):
+                state = GameState(25, bitboard=True, k=4)
+                for i in range(rng.randint(2, 8)):
+                    state.make_move(1 + i % 2, rng.choice(state.legal_moves()))
+                if state.is_over():
+                    continue
+                expected = serial.alphabeta_root(state, 1, depth)
+                self.assertEqual(parallel.parallel_root(state, 1, depth), expected, state.board.cells())
+                self.assertEqual(parallel.get_move(state), expected[1])
+        finally:
+            parallel.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    """
+    This class caches fonts by (font, size) so each TTF is loaded once,
+    and rendered text surfaces by (text, font, size, color).
+    The least recently used surface is dropped when there are more than max_surfaces.
+    """
+
+    def __init__(self, max_surfaces=256):
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, name, size, color):
+        """ Return a surface with the text rendered, reusing a cached one if possible. """
+        key = (text, name, size, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(name, size).render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_surfaces:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
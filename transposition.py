@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from functools import lru_cache
+from math import isqrt
+
+# Kinds of cached scores.
+# Alpha-beta cut-offs only prove a bound on the score of a position.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+
+@lru_cache(maxsize=None)
+def symmetries(width):
+    """
+    Return the 8 rotations and reflections of a width x width board.
+    Each tuple maps a square of the transformed board to a square of the original.
+    """
+    transforms = (
+        lambda row, col: (row, col),
+        lambda row, col: (width - 1 - col, row),
+        lambda row, col: (width - 1 - row, width - 1 - col),
+        lambda row, col: (col, width - 1 - row),
+        lambda row, col: (row, width - 1 - col),
+        lambda row, col: (width - 1 - row, col),
+        lambda row, col: (col, row),
+        lambda row, col: (width - 1 - col, width - 1 - row),
+    )
+    result = []
+    for transform in transforms:
+        squares = []
+        for row in range(width):
+            for col in range(width):
+                old_row, old_col = transform(row, col)
+                squares.append(old_row*width + old_col)
+        result.append(tuple(squares))
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def inverses(width):
+    """ Return the inverse of each symmetry of a width x width board. """
+    return tuple(tuple(sym.index(i) for i in range(len(sym))) for sym in symmetries(width))
+
+
+def canonical(cells):
+    """
+    Return the smallest base-3 hash over the 8 symmetries of a board,
+    and the index of the symmetry that produced it.
+    """
+    best_key = None
+    best_sym = 0
+    for index, sym in enumerate(symmetries(isqrt(len(cells)))):
+        key = 0
+        for square in sym:
+            key = key*3 + cells[square]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_sym = index
+    return best_key, best_sym
+
+
+def to_canonical(pos, sym, width=3):
+    """ Map a square of the original board onto the canonical board. """
+    return pos if pos < 0 else inverses(width)[sym][pos]
+
+
+def from_canonical(pos, sym, width=3):
+    """ Map a square of the canonical board back onto the original board. """
+    return pos if pos < 0 else symmetries(width)[sym][pos]
+
+
+class TranspositionTable:
+    """
+    This class caches solved positions.
+    Entries are keyed by canonical board hash, so all symmetric boards share one entry.
+    The least recently used entry is evicted when the table is full.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """ Return the cached entry for key, or None. """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,40 @@
+import threading
+from player import SearchCancelled
+
+
+class MoveWorker:
+    """
+    This class computes a player's move in a background thread,
+    on a snapshot of the game state, so the caller can keep handling events.
+    """
+
+    def __init__(self, player, state):
+        self.player = player
+        self.snapshot = state.copy()
+        self.move = None
+        self.error = None
+        self.player.cancelled = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            self.move = self.player.get_move(self.snapshot)
+        except SearchCancelled:
+            pass
+        except Exception as error:
+            self.error = error
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def result(self):
+        """ Return the computed move, re-raising any error from the thread. """
+        if self.error is not None:
+            raise self.error
+        return self.move
+
+    def cancel(self):
+        """ Stop the computation and wait for the thread to finish. """
+        self.player.cancel()
+        self.thread.join()